@@ -0,0 +1,75 @@
+import time
+import zlib
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from services.vector_store import NumpyBackend
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    deterministic stand-in for OllamaEmbeddings.
+
+    texts are hashed into a fixed number of dimensions from their words and
+    character trigrams, so paraphrases sharing words end up close together and
+    the thresholds of the server behave roughly like with a real model.
+    every call sleeps latency_ms plus per_item_ms for every text, like a
+    round trip to Ollama.
+    """
+
+    def __init__(self, dim: int = 256, latency_ms: float = 0.0, per_item_ms: float = 0.0):
+        self.dim = dim
+        self.latency = latency_ms / 1000
+        self.per_item = per_item_ms / 1000
+        self.calls = 0
+        self.texts = 0
+
+    def _vector(self, text: str) -> list[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = text.lower().split()
+        padded = f" {' '.join(words)} "
+        features = words + [padded[i:i + 3] for i in range(len(padded) - 2)]
+        for feature in features:
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        self.texts += len(texts)
+        delay = self.latency + self.per_item * len(texts)
+        if delay:
+            time.sleep(delay)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+class LatencyNumpyBackend(NumpyBackend):
+    """in-process numpy index standing in for Milvus, every search sleeps latency_ms first"""
+
+    def __init__(self, embedding_model, index_name, index_dir, latency_ms: float = 0.0):
+        super().__init__(embedding_model, index_name, index_dir=index_dir)
+        self.latency = latency_ms / 1000
+        self.searches = 0
+
+    def search(self, embedding, k, ids=None, categories=None):
+        self.searches += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return super().search(embedding, k, ids, categories)
+
+    def search_many(self, embeddings, k):
+        self.searches += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return super().search_many(embeddings, k)
+
+
+def latency_backend(index_dir: str, latency_ms: float):
+    """
+    :return: backend factory for services.vector_store.BACKENDS
+    """
+    return lambda embedding_model, index_name: LatencyNumpyBackend(
+        embedding_model, index_name, index_dir, latency_ms
+    )
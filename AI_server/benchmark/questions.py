@@ -0,0 +1,78 @@
+import csv
+import json
+import random
+
+CSV_PATH = "../careerhub-ml/questions(Sheet1) (1).csv"
+QA_LIST_PATH = "./background_docs/QA_list.json"
+
+PREFIXES = ["", "hi ", "hello, ", "quick question: ", "can you tell me ", "please "]
+SUFFIXES = ["", "?", " please", " thanks", " asap", " for my degree"]
+
+
+def load_csv_questions(path: str = CSV_PATH) -> list[str]:
+    """
+    :return list: questions of the careerhub-ml CSV, as logged
+    """
+    with open(path, "r", encoding="latin1", newline="") as f:
+        return [row["question"].strip() for row in csv.DictReader(f) if row.get("question", "").strip()]
+
+
+def load_qa_paraphrases(path: str = QA_LIST_PATH) -> list[str]:
+    """
+    :return list: every stored paraphrase of QA_list.json
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return [q for item in json.load(f) for q in item.get("questions", [])]
+
+
+def typo(text: str, rng: random.Random) -> str:
+    if len(text) < 4:
+        return text
+    i = rng.randrange(1, len(text) - 2)
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+
+def drop_word(text: str, rng: random.Random) -> str:
+    words = text.split()
+    if len(words) < 3:
+        return text
+    del words[rng.randrange(len(words))]
+    return " ".join(words)
+
+
+def synthetic_variants(questions: list[str], n: int, seed: int = 42) -> list[str]:
+    """
+    reworded copies of the questions: a typo, a dropped word, a greeting or a
+    trailing phrase, chosen with a fixed seed so every run replays the same set.
+
+    :param questions: source questions
+    :param n: number of variants
+    :return list: variants
+    """
+    rng = random.Random(seed)
+    variants = []
+    for _ in range(n):
+        text = rng.choice(questions)
+        if rng.random() < 0.5:
+            text = typo(text, rng)
+        if rng.random() < 0.3:
+            text = drop_word(text, rng)
+        variants.append(rng.choice(PREFIXES) + text + rng.choice(SUFFIXES))
+    return variants
+
+
+def synthetic_paraphrases(questions: list[str], n: int, seed: int = 42) -> list[str]:
+    """
+    n distinct paraphrase-like texts for the rebuild benchmark.
+
+    :param questions: source questions
+    :param n: number of texts
+    :return list: distinct texts
+    """
+    rng = random.Random(seed)
+    texts = dict.fromkeys(questions[:n])
+    i = 0
+    while len(texts) < n:
+        texts[f"{rng.choice(PREFIXES)}{rng.choice(questions)} {i}"] = None
+        i += 1
+    return list(texts)
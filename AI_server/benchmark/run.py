@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import numpy as np
+
+from benchmark.fakes import FakeEmbeddings, latency_backend
+from benchmark.questions import (
+    load_csv_questions,
+    load_qa_paraphrases,
+    synthetic_paraphrases,
+    synthetic_variants,
+)
+
+RESULTS_PATH = "./benchmark/results.json"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmark",
+        description="benchmark the AI server against local stand-ins of Ollama and Milvus",
+    )
+    parser.add_argument("--concurrency", default="1,8,32", help="comma separated concurrency levels")
+    parser.add_argument("--embed-latency-ms", type=float, default=20.0, help="latency of every embedding call")
+    parser.add_argument("--embed-item-ms", type=float, default=0.5, help="extra latency per embedded text")
+    parser.add_argument("--search-latency-ms", type=float, default=2.0, help="latency of every vector search")
+    parser.add_argument("--dim", type=int, default=256, help="dimensions of the fake embeddings")
+    parser.add_argument("--synthetic", type=int, default=500, help="number of synthetic question variants")
+    parser.add_argument("--repeat", type=int, default=1, help="passes over every question set")
+    parser.add_argument("--warm", action="store_true", help="keep answer and embedding caches between passes")
+    parser.add_argument("--sizes", default="100,1000,10000,100000", help="paraphrase counts of the rebuild benchmark")
+    parser.add_argument("--skip-load", action="store_true", help="only run the rebuild benchmark")
+    parser.add_argument("--skip-rebuild", action="store_true", help="only run the load benchmark")
+    parser.add_argument("--out", default=RESULTS_PATH, help="JSON results file")
+    return parser.parse_args(argv)
+
+
+def summarize(latencies_ms: list[float], wall_s: float, errors: int) -> dict:
+    latencies = np.asarray(latencies_ms, dtype=np.float64)
+    if len(latencies) == 0:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": int(len(latencies)),
+        "errors": errors,
+        "throughput_rps": len(latencies) / wall_s if wall_s else 0.0,
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def setup_app(args, work_dir: str):
+    """
+    import the app with every external dependency replaced by a local stand-in.
+    nothing is written next to the real dataset: the index, caches and
+    sessions live in work_dir.
+    """
+    os.environ["EMBED_CACHE_PATH"] = ""
+    os.environ["SESSION_BACKEND"] = "memory"
+    os.environ["VECTOR_BACKEND"] = "numpy"
+    os.environ["NUMPY_INDEX_DIR"] = work_dir
+    os.environ["SNAPSHOT_DIR"] = work_dir
+
+    from services import vector_store
+    # the module is already imported by benchmark.fakes, so its lock directory is set directly
+    vector_store.BUILD_LOCK_DIR = work_dir
+    import main
+    from routers import chat
+    from services.model import get_model, CHAT_EMBED_MODEL, CATEGORY_EMBED_MODEL
+
+    embeddings = {}
+    for name in dict.fromkeys([CHAT_EMBED_MODEL, CATEGORY_EMBED_MODEL]):
+        embeddings[name] = FakeEmbeddings(args.dim, args.embed_latency_ms, args.embed_item_ms)
+        # clients are created lazily, so the fake is in place before the first call
+        get_model(name).client.factory = lambda fake=embeddings[name]: fake
+    vector_store.BACKENDS["bench"] = latency_backend(work_dir, args.search_latency_ms)
+    chat.vectore_store.backend_name = "bench"
+    return main, chat, embeddings
+
+
+def reset_caches(chat, embeddings):
+    from services.model import get_model
+
+    chat.answer_cache.clear()
+    for name in embeddings:
+        get_model(name).embedding_cache.memory.clear()
+
+
+async def replay(client, requests: list[tuple[str, str, dict]], concurrency: int) -> dict:
+    """
+    send the requests with at most concurrency in flight.
+
+    :param requests: (method, url, options) of every request
+    :return dict: latency percentiles, throughput and the tier of every /chat/ask answer
+    """
+    latencies, tiers = [], {}
+    errors = 0
+    queue = iter(requests)
+
+    async def worker():
+        nonlocal errors
+        for method, url, options in queue:
+            start = time.perf_counter()
+            response = await client.request(method, url, **options)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors += 1
+            elif url == "/chat/ask":
+                tier = response.json().get("tier")
+                tiers[tier] = tiers.get(tier, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result = summarize(latencies, time.perf_counter() - start, errors)
+    if tiers:
+        result["tiers"] = tiers
+    return result
+
+
+async def run_load(args, work_dir: str) -> list[dict]:
+    import httpx
+
+    main, chat, embeddings = setup_app(args, work_dir)
+    from services.startup import readiness
+
+    start = time.perf_counter()
+    # warmed in the foreground, the load must not start before the app is ready
+    ready = await readiness.warm_up()
+    warm_up_s = time.perf_counter() - start
+    if not ready:
+        raise RuntimeError(f"warm-up failed: {readiness.status}")
+
+    qa = load_qa_paraphrases()
+    question_sets = {
+        "csv": load_csv_questions(),
+        "qa": qa,
+        "synthetic": synthetic_variants(qa, args.synthetic),
+    }
+    scenarios = []
+    for set_name, questions in question_sets.items():
+        scenarios.append((f"ask:{set_name}", [("POST", "/chat/ask", {"json": {"question": q}}) for q in questions]))
+        scenarios.append((
+            f"group_one:{set_name}",
+            [("GET", "/category/group_one", {"params": {"question": q}}) for q in questions],
+        ))
+    scenarios.append(("cat_all_count", [("GET", "/category/cat_all_count", {})] * 200))
+
+    results = [{"scenario": "warm_up", "seconds": warm_up_s}]
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            for name, requests in scenarios:
+                for run in range(args.repeat):
+                    if not args.warm:
+                        reset_caches(chat, embeddings)
+                    calls = {model: fake.calls for model, fake in embeddings.items()}
+                    result = await replay(client, requests, concurrency)
+                    result.update({
+                        "scenario": name,
+                        "concurrency": concurrency,
+                        "run": run,
+                        "embed_calls": sum(fake.calls - calls[model] for model, fake in embeddings.items()),
+                    })
+                    print(
+                        f"{name:24} c={concurrency:<3} p50={result.get('p50_ms', 0):8.2f}ms "
+                        f"p95={result.get('p95_ms', 0):8.2f}ms p99={result.get('p99_ms', 0):8.2f}ms "
+                        f"{result.get('throughput_rps', 0):8.1f} req/s"
+                    )
+                    results.append(result)
+    await readiness.stop()
+    return results
+
+
+def run_rebuild(args, work_dir: str) -> list[dict]:
+    """
+    time a full vector store build, the lexical index build and an incremental
+    rebuild with 1% of the paraphrases changed, for every dataset size.
+    """
+    from routers.chat import normalize
+    from services.lexical_index import LexicalIndex
+    from services.vector_store import Vector_store, BACKENDS
+
+    qa = [normalize(q) for q in load_qa_paraphrases()]
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        documents = synthetic_paraphrases(qa, size)
+        fake = FakeEmbeddings(args.dim, args.embed_latency_ms, args.embed_item_ms)
+        index_dir = tempfile.mkdtemp(dir=work_dir)
+        BACKENDS["bench"] = latency_backend(index_dir, args.search_latency_ms)
+        store = Vector_store(embedding_model=fake, index_name="bench", backend="bench")
+
+        start = time.perf_counter()
+        store.sync_vector_store(documents)
+        full_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        LexicalIndex(documents)
+        lexical_s = time.perf_counter() - start
+
+        changed = max(1, size // 100)
+        edited = documents[changed:] + [f"{text} edited" for text in documents[:changed]]
+        calls = fake.texts
+        start = time.perf_counter()
+        changes = store.sync_vector_store(edited)
+        incremental_s = time.perf_counter() - start
+
+        result = {
+            "paraphrases": size,
+            "full_build_s": full_s,
+            "lexical_index_s": lexical_s,
+            "incremental_s": incremental_s,
+            "incremental_embedded": fake.texts - calls,
+            "incremental_changes": changes,
+        }
+        print(
+            f"rebuild {size:>7} paraphrases: full {full_s:8.2f}s, lexical {lexical_s:6.2f}s, "
+            f"1% changed {incremental_s:6.2f}s"
+        )
+        results.append(result)
+    return results
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+    }
+    with tempfile.TemporaryDirectory(prefix="ai-server-benchmark-") as work_dir:
+        if not args.skip_load:
+            output["load"] = asyncio.run(run_load(args, work_dir))
+        if not args.skip_rebuild:
+            output["rebuild"] = run_rebuild(args, work_dir)
+
+    directory = os.path.dirname(args.out)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"results written to {args.out}")
@@ -1,19 +1,74 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from routers import chat
 from routers import category
-app = FastAPI()
+from services.startup import readiness
+from services.metrics import registry
+from services.concurrency import run_blocking
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # clients are created here instead of at import time, Milvus and Ollama are
+    # connected with retry and warmed up in the background; /ready is 503 until then
+    await readiness.start()
+    yield
+    await readiness.stop()
+    chat.session_chats.close()
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(chat.routers)
 app.include_router(category.routers)
 
+@app.get("/health")
+async def health():
+    """
+    check that Milvus and the Ollama embedding models can be reached.
+
+    :return dict: ok flag and error per component, 503 if one of them fails
+    """
+    components = await readiness.check()
+    ok = all(component["ok"] for component in components.values())
+    return JSONResponse({"ok": ok, "components": components}, status_code=200 if ok else 503)
+
+@app.get("/ready")
+async def ready():
+    """
+    :return dict: warm-up state per component, 503 until every component is warmed up
+    """
+    return JSONResponse(
+        {"ready": readiness.ready, "components": readiness.status},
+        status_code=200 if readiness.ready else 503,
+    )
+
+@app.get("/metrics")
+async def metrics():
+    """
+    stage timings, tier counters, score histograms and cache/session/limiter gauges.
+
+    :return str: every metric in the Prometheus text exposition format
+    """
+    # gauges may read the sqlite session store, so render off the event loop
+    return PlainTextResponse(await run_blocking(registry.render), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     return {
-        "/chat/ask": "return the answer response for user question. POST request with JSON body containing 'user_id' and 'question'",
+        "/health": "check that Milvus and the Ollama embedding models can be reached, 503 otherwise. GET request",
+        "/ready": "return the warm-up state of every component, 503 until the worker is warmed up. GET request",
+        "/metrics": "return stage timings, tier counters, score histograms and cache/session gauges in the Prometheus text format. GET request",
+        "/chat/ask": "return the answer response for user question and the tier which answered it. POST request with JSON body containing 'user_id' and 'question'",
+        "/chat/ask_batch": "return category, answer, score, matched_question and tier for every question, in order. POST request with JSON body containing 'questions'",
         "/chat/most_relevant": "return the most relevant question from the qa_list along with similarity score. GET request with 'question' query parameter",
+        "/chat/match_stats": "return how many questions each matching tier answered and the mean latency. GET request",
+        "/chat/cache_stats": "return hit/miss/eviction counters of the embedding and answer caches. GET request",
+        "/chat/scheduler_stats": "return batch fill and queue wait statistics of the embedding scheduler and request limiter counters. GET request",
         "/chat/history": "retrieve chat history for a given user_id.GET request with 'user_id' query parameter",
+        "/chat/session_stats": "return live sessions, bytes held and eviction counters of the session store. GET request",
         "/chat/reset": "reset chat history for a given user_id. GET request with 'user_id' query parameter",
         "/chat/get_qa": "retrieve the entire QA list from the qa_list. GET request",
-        "/chat/update_qa": "update the QA list with a new QA list. PUT request with JSON body containing the new QA list",
+        "/chat/update_qa": "update the QA list with a new QA list. PUT request with JSON body containing the new QA list. The vector store is rebuilt in the background, the response contains the job_id",
+        "/chat/rebuild_status": "return status, progress and duration of a background rebuild job and the active vector store version. GET request with optional 'job_id' query parameter",
         "/chat/delete_qa": "delete the existing QA list. DELETE request"
         }
\ No newline at end of file
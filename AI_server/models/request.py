@@ -4,6 +4,9 @@ class RequestModel(BaseModel):
     user_id: str | None = None
     question: str | None = None
 
+class BatchRequestModel(BaseModel):
+    questions: list[str] = []
+
 class CategoryRequestModel(BaseModel):
     category: str | None = None
     questions: list[str] | None = None
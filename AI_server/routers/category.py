@@ -1,16 +1,147 @@
-from fastapi import APIRouter,Request
-from services.model import Model
-from sklearn.metrics.pairwise import cosine_similarity
+from fastapi import APIRouter,Request,Response
+from starlette.responses import StreamingResponse
+from services.model import get_model, CATEGORY_EMBED_MODEL
+from services.category_index import CategoryIndex
+from services.concurrency import FileLock, run_blocking
+from services.startup import readiness, WARMUP_PROBE
+from services.metrics import span
+from services.utils import write_atomic
 from models.request import CategoryRequestModel
 import json
+import os
+import threading
 
 routers = APIRouter(prefix="/category", tags=["category"])
-embedding_model = Model(model_name="mxbai-embed-large").embedding_model
-with open('routers/categories.json','r',encoding='utf-8') as f:
-    categories = json.load(f)
-with open('routers/questions.json','r',encoding='utf-8') as f:
-    questions = json.load(f)
+model = get_model(CATEGORY_EMBED_MODEL)
+embedding_model = model.embedding_model
+CATEGORIES_PATH = 'routers/categories.json'
+QUESTIONS_PATH = 'routers/questions.json'
 THRESHOLD = 0.53 
+# categories and questions are read on first use and embedded once, then kept as normalized matrices.
+# they are read again when another worker changed the files
+category_index = None
+_files_signature = None
+_category_index_lock = threading.Lock()
+# held by the worker writing categories.json or questions.json
+_category_write_lock = FileLock(f"{CATEGORIES_PATH}.lock")
+# questions embedded per call by /group_bulk
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "64"))
+
+def files_signature():
+    """
+    :return tuple: mtime and size of categories.json and questions.json
+    """
+    return tuple((stat.st_mtime_ns, stat.st_size) for stat in map(os.stat, (CATEGORIES_PATH, QUESTIONS_PATH)))
+
+def get_category_index() -> CategoryIndex:
+    """
+    read categories.json and questions.json on first use, and again when
+    another worker changed them.
+
+    :return CategoryIndex: the shared category index
+    """
+    global category_index, _files_signature
+    if category_index is None or files_signature() != _files_signature:
+        with _category_index_lock:
+            # taken before reading, so a write in between makes the index stale rather than wrong
+            signature = files_signature()
+            if category_index is None or signature != _files_signature:
+                with span("json_read"):
+                    with open(CATEGORIES_PATH,'r',encoding='utf-8') as f:
+                        categories = json.load(f)
+                    with open(QUESTIONS_PATH,'r',encoding='utf-8') as f:
+                        questions = json.load(f)
+                category_index = CategoryIndex(embedding_model, categories, questions, THRESHOLD)
+                _files_signature = signature
+    return category_index
+
+async def load_category_index() -> CategoryIndex:
+    return await run_blocking(get_category_index)
+
+def save_json(path: str, values: list):
+    """
+    replace the file atomically, so other workers never read it half written.
+    MUST be called under _category_write_lock
+    """
+    global _files_signature
+    raw = json.dumps(values,ensure_ascii=False,indent=4).encode("utf-8")
+    with span("json_write"):
+        write_atomic(path, lambda f: f.write(raw))
+    # our own write does not make the index stale
+    _files_signature = files_signature()
+
+def _add_category_locked(category: str) -> bool:
+    """
+    add the category and write categories.json. the existence check, the insert
+    and the write happen under the write lock, so two concurrent requests, also
+    of different workers, can neither add the same category twice nor write the
+    file out of order.
+
+    :return bool: False if the category already exists
+    """
+    with _category_write_lock:
+        category_index = get_category_index()
+        if not category_index.add_category(category):
+            return False
+        save_json(CATEGORIES_PATH, category_index.categories)
+        return True
+
+def _remove_category_locked(category: str) -> bool:
+    """
+    :return bool: False if the category does not exist
+    """
+    with _category_write_lock:
+        category_index = get_category_index()
+        if not category_index.remove_category(category):
+            return False
+        save_json(CATEGORIES_PATH, category_index.categories)
+        return True
+
+def _add_questions_locked(questions: list[str]) -> bool:
+    """
+    :return bool: False if every question already exists
+    """
+    with _category_write_lock:
+        category_index = get_category_index()
+        existing = set(category_index.questions)
+        new_questions = [q for q in dict.fromkeys(questions) if q and q not in existing]
+        if not new_questions:
+            return False
+        category_index.add_questions(new_questions)
+        save_json(QUESTIONS_PATH, category_index.questions)
+        return True
+
+def _remove_questions_locked(questions: list[str]) -> bool:
+    """
+    :return bool: False if none of the questions exists
+    """
+    with _category_write_lock:
+        category_index = get_category_index()
+        to_remove = set(questions) & set(category_index.questions)
+        if not to_remove:
+            return False
+        category_index.remove_questions(list(to_remove))
+        save_json(QUESTIONS_PATH, category_index.questions)
+        return True
+
+def warm_up_category_index():
+    model.warm_up(WARMUP_PROBE)
+    get_category_index().ensure_loaded()
+
+readiness.register("category_index", warm_up_category_index, lambda: model.warm_up(WARMUP_PROBE))
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    streaming response whose generator is still reading the request body.
+    StreamingResponse normally listens for a client disconnect at the same time,
+    which would take the body messages away from the generator; here the body
+    reader notices the disconnect instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
 
 @routers.get("/group")
 async def group():
@@ -19,22 +150,10 @@ async def group():
     
     :return list: question's categories
     """
-
-    categories_embedding = embedding_model.embed_documents(categories)
-    question_embedding = embedding_model.embed_documents(questions)
-    if len(question_embedding) == 0 or len(categories_embedding) == 0:
+    category_index = await load_category_index()
+    if await run_blocking(category_index.is_empty):
         return {"error": "No embeddings found."}
-    sim = cosine_similarity(question_embedding, categories_embedding)
-    results = []
-    for i, question in enumerate(questions):
-        max_index = sim[i].argmax()
-        max_value = sim[i][max_index]
-        if max_value >= THRESHOLD:
-            results.append(categories[max_index])
-        else:
-            results.append("unknown")
-
-    return results
+    return category_index.group()
 
 @routers.get("/group_one")
 async def group_one(question: str):
@@ -44,29 +163,10 @@ async def group_one(question: str):
     :param question: user question
     :return str: category of the question
     """
-    categories_embedding = embedding_model.embed_documents(categories)
-    question_embedding = embedding_model.embed_documents([question])
-    if len(question_embedding) == 0 or len(categories_embedding) == 0:
+    category_index = await load_category_index()
+    if not question or not category_index.categories:
         return {"error": "No embeddings found."}
-    sim = cosine_similarity(question_embedding, categories_embedding)
-    #TODO compare the similarity value with theshold. 
-    # If the value more than theshold return the corresponding category
-    # else return "unknown"
-    # add your logic here 
-    if len(question_embedding) == 0 or len(categories_embedding) == 0:
-        return {"error": "No embeddings found."}
-    sim = cosine_similarity(question_embedding, categories_embedding)
-    #TODO compare the similarity value with theshold. 
-    # If the value more than theshold return the corresponding category
-    # else return "unknown"
-
-    scores = sim[0]
-    max_index = scores.argmax()
-    max_value = scores[max_index]
-    if max_value >= THRESHOLD:
-        return categories[max_index]
-    return "unknown"
-    return None # replace this command with your logic
+    return await run_blocking(category_index.classify, question)
 
 @routers.post("/questions_belong_to")
 async def questions_belong_to(req: CategoryRequestModel):
@@ -78,63 +178,124 @@ async def questions_belong_to(req: CategoryRequestModel):
     """
     category = req.category
     questions = req.questions
-    categories_embedding = embedding_model.embed_documents([category])
-    question_embedding = embedding_model.embed_documents(questions)
-    if len(question_embedding) == 0 or len(categories_embedding) == 0:
+    if not category or not questions:
         return {"error": "No embeddings found."}
-    sim = cosine_similarity(question_embedding, categories_embedding)
-    results = []
-    for i, score in enumerate(sim):
-        if score[0] >= THRESHOLD:
-            results.append(questions[i])
-    return results
+    category_index = await load_category_index()
+    category_embedding = await run_blocking(category_index.category_vector, category)
+    question_embedding = await run_blocking(category_index.embed, questions)
+    sim = question_embedding @ category_embedding
+    return [question for question, score in zip(questions, sim) if score >= THRESHOLD]
 
 @routers.get("/cat_all_count")
-async def cat_all_count():
+async def cat_all_count(response: Response):
     """
     return the count of all categories.
+    the counts are kept up to date when categories or questions change, their
+    version and update time are sent in the X-Counts-Version and X-Counts-Updated-At headers.
     
     :return dict: count of all categories
     """
-    count_dict = {}
-    categories_embedding = embedding_model.embed_documents(categories)
-    question_embedding = embedding_model.embed_documents(questions)
-    if len(question_embedding) == 0 or len(categories_embedding) == 0:
+    category_index = await load_category_index()
+    if await run_blocking(category_index.is_empty):
         return {"error": "No embeddings found."}
-    sim = cosine_similarity(question_embedding, categories_embedding)
-    for i, question in enumerate(questions):
-        max_index = sim[i].argmax()
-        max_value = sim[i][max_index]
-        if max_value >= THRESHOLD:
-            category = categories[max_index]
-        else:
-            category = "unknown"
-        if category in count_dict:
-            count_dict[category] += 1
-        else:
-            count_dict[category] = 1
-    return count_dict
+    set_count_headers(response, category_index)
+    return category_index.count_all()
 
 @routers.get("/cat_count")
-async def cat_count(category: str):
+async def cat_count(category: str, response: Response):
     """
     return the count of category.
     
     :return int: count of all category
     """
-    categories_embedding = embedding_model.embed_documents([category])
-    question_embedding = embedding_model.embed_documents(questions)
-    if len(question_embedding) == 0 or len(categories_embedding) == 0:
+    category_index = await load_category_index()
+    if await run_blocking(category_index.is_empty):
+        return {"error": "No embeddings found."}
+    set_count_headers(response, category_index)
+    return await run_blocking(category_index.count_category, category)
+
+def set_count_headers(response: Response, category_index: CategoryIndex):
+    response.headers["X-Counts-Version"] = str(category_index.counts_version)
+    response.headers["X-Counts-Updated-At"] = str(category_index.counts_updated_at)
+
+@routers.post("/group_bulk")
+async def group_bulk(req: Request):
+    """
+    categorize a large number of questions, e.g. logged interactions.
+    the request body is NDJSON, one question per line either as a JSON string
+    or as an object with a "question" field. questions are read while the body
+    streams in, embedded in fixed-size batches and classified a whole batch at a
+    time, and the results stream back as NDJSON, so memory stays flat.
+
+    :param req: NDJSON request body
+    :return NDJSON: one {"index", "question", "category", "score"} line per question,
+        or {"index", "error"} for a line which could not be read
+    """
+    category_index = await load_category_index()
+    if not category_index.categories:
         return {"error": "No embeddings found."}
-    sim = cosine_similarity(question_embedding, categories_embedding)
-    count = 0
-    #TODO loop the similarity array and compare the similarity value with theshold. 
-    # If the value more than theshold increase the count by 1
-    # add your logic here
-    for i in range(len(sim)):
-        if sim[i][0] >= THRESHOLD:
-            count += 1
-    return count
+    await run_blocking(category_index.ensure_loaded)
+    return BodyStreamingResponse(categorize_stream(req, category_index), media_type="application/x-ndjson")
+
+async def read_ndjson_questions(req: Request):
+    """
+    yield the questions of an NDJSON body as the chunks arrive.
+
+    :param req: NDJSON request body
+    :return: async generator of question strings, None for unreadable lines
+    """
+    buffer = b""
+    async for chunk in req.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield parse_question_line(line)
+    if buffer.strip():
+        yield parse_question_line(buffer)
+
+def parse_question_line(line: bytes) -> str | None:
+    try:
+        value = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(value, dict):
+        value = value.get("question")
+    return value if isinstance(value, str) and value else None
+
+async def categorize_stream(req: Request, category_index: CategoryIndex):
+    batch = []
+    index = 0
+    async for question in read_ndjson_questions(req):
+        batch.append((index, question))
+        index += 1
+        if len(batch) >= BULK_BATCH_SIZE:
+            yield await categorize_batch(batch, category_index)
+            batch = []
+    if batch:
+        yield await categorize_batch(batch, category_index)
+
+async def categorize_batch(batch: list, category_index: CategoryIndex) -> bytes:
+    """
+    :param batch: (index, question) pairs, question is None for unreadable lines
+    :param category_index: loaded category index
+    :return bytes: NDJSON lines of the batch
+    """
+    questions = [q for _, q in batch if q is not None]
+    labels, scores = [], []
+    if questions:
+        matrix = await run_blocking(category_index.embed, questions)
+        labels, scores = category_index.assign_with_scores(matrix)
+    results = iter(zip(labels, scores))
+    lines = []
+    for i, question in batch:
+        if question is None:
+            record = {"index": i, "error": "invalid line"}
+        else:
+            label, score = next(results)
+            record = {"index": i, "question": question, "category": label, "score": round(float(score), 4)}
+        lines.append(json.dumps(record, ensure_ascii=False))
+    return ("\n".join(lines) + "\n").encode("utf-8")
 
 @routers.post("/add")
 async def update(req: CategoryRequestModel):
@@ -145,10 +306,7 @@ async def update(req: CategoryRequestModel):
     :return str: success message
     """
     new_category = req.category
-    if new_category and new_category not in categories:
-        categories.append(new_category)
-        with open('routers/categories.json','w',encoding='utf-8') as f:
-            json.dump(categories,f,ensure_ascii=False,indent=4)
+    if new_category and await run_blocking(_add_category_locked, new_category):
         return {"message": "Categories updated successfully."}
     else:
         return {"message": "Category already exists or invalid."}
@@ -162,14 +320,35 @@ async def remove(req: CategoryRequestModel):
     :return str: success message
     """
     category_to_remove = req.category
-    if category_to_remove and category_to_remove in categories:
-        categories.remove(category_to_remove)
-        with open('routers/categories.json','w',encoding='utf-8') as f:
-            json.dump(categories,f,ensure_ascii=False,indent=4)
+    if category_to_remove and await run_blocking(_remove_category_locked, category_to_remove):
         return {"message": "Category removed successfully."}
     else:
         return {"message": "Category not found or invalid."}
 
+@routers.post("/add_questions")
+async def add_questions(req: CategoryRequestModel):
+    """
+    add questions to the questions list, only the new questions are embedded.
+
+    :param questions: new questions
+    :return str: success message
+    """
+    if not await run_blocking(_add_questions_locked, req.questions or []):
+        return {"message": "Questions already exist or invalid."}
+    return {"message": "Questions added successfully."}
+
+@routers.post("/remove_questions")
+async def remove_questions(req: CategoryRequestModel):
+    """
+    remove questions from the questions list.
+
+    :param questions: questions to remove
+    :return str: success message
+    """
+    if not await run_blocking(_remove_questions_locked, req.questions or []):
+        return {"message": "Questions not found or invalid."}
+    return {"message": "Questions removed successfully."}
+
 @routers.get("/list")
 async def list_categories():
     """
@@ -177,4 +356,5 @@ async def list_categories():
     
     :return list: all categories
     """
-    return categories
\ No newline at end of file
+    category_index = await load_category_index()
+    return category_index.categories
\ No newline at end of file
@@ -1,56 +1,307 @@
+import os
 import re
-from fastapi import APIRouter,Request
-from models.request import RequestModel
-from services.vector_store import Vector_store
-from services.model import Model
-from services.chat import Chat
-import json
+import threading
+import time
+import numpy as np
+from fastapi import APIRouter,HTTPException,Request,Response
+from models.request import RequestModel, BatchRequestModel
+from services.vector_store import Vector_store, doc_id
+from services.model import get_model, CHAT_EMBED_MODEL, CATEGORY_EMBED_MODEL
+from services.utils import normalize_rows
+from services.session_store import SessionStore
+from services.cache import LRUCache
+from services.lexical_index import LexicalIndex
+from services.jobs import RebuildWorker
+from services.concurrency import RequestLimiter, run_blocking
+from services.qa_repository import QARepository
+from services.snapshot import RetrievalSnapshot
+from services.startup import readiness, WARMUP_PROBE
+from services.question_classifier import QuestionClassifier
+from services.log import get_logger
+from services.metrics import registry, span, traced
+from routers.category import get_category_index
 from typing import Dict
 
 routers = APIRouter(prefix="/chat", tags=["chat"])
-embedding_model = Model(model_name="nomic-embed-text").embedding_model
-vectore_store = Vector_store(embedding_model=embedding_model, index_name="qa_list")
-session_chats = {}
+logger = get_logger("chat")
+model = get_model(CHAT_EMBED_MODEL)
+embedding_model = model.embedding_model
+embedding_scheduler = model.scheduler
+vectore_store = Vector_store(embedding_model=embedding_model, index_name="qa_list", model_name=model.model_name)
+qa_repository = QARepository()
+retrieval_snapshot = RetrievalSnapshot(vectore_store.index_name)
+rebuild_worker = RebuildWorker()
+request_limiter = RequestLimiter()
+# batches run longer than single questions, so they get their own slots and timeout
+MAX_BATCH_QUESTIONS = int(os.getenv("MAX_BATCH_QUESTIONS", "1000"))
+batch_limiter = RequestLimiter(
+    max_concurrent=int(os.getenv("MAX_CONCURRENT_BATCHES", "2")),
+    max_waiting=int(os.getenv("MAX_WAITING_BATCHES", "8")),
+    timeout=float(os.getenv("BATCH_TIMEOUT", "120")),
+)
+session_chats = SessionStore()
 
 QUESTION_MAP: Dict[str, dict] = {}
+LEXICAL_INDEX = LexicalIndex()
+# sha256 of the QA_list.json the question map was built from
+DATASET_HASH: str | None = None
+_question_map_lock = threading.Lock()
+# category -> lexical index rows of its paraphrases
+CATEGORY_PARTITIONS: Dict[str, np.ndarray] = {}
+question_classifier = QuestionClassifier()
+
+# answers only depend on the normalized question and the dataset content,
+# so they are cached per dataset hash, which every worker reads from the same file.
+# the version counts the question map and vector store swaps of this worker
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+answer_cache = LRUCache(ANSWER_CACHE_SIZE)
+DATASET_VERSION = 0
+
+# a lexical match is only trusted when it is close to a stored question and
+# clearly better than the runner-up pointing at another answer
+LEXICAL_THRESHOLD = float(os.getenv("LEXICAL_THRESHOLD", "0.8"))
+LEXICAL_MARGIN = float(os.getenv("LEXICAL_MARGIN", "0.05"))
+# when both routers use the same embedding model, the embedding computed for
+# retrieval also assigns the category of questions which have no answer
+REUSE_QUESTION_EMBEDDING = os.getenv("REUSE_QUESTION_EMBEDDING", "1") == "1" and CHAT_EMBED_MODEL == CATEGORY_EMBED_MODEL
+# the careerhub-ml classifier narrows the vector search to the predicted
+# categories above CLASSIFIER_FILTER_CONFIDENCE; above CLASSIFIER_CONFIDENCE a
+# lexical match within those categories answers without calling Ollama
+CLASSIFIER_FILTER_CONFIDENCE = float(os.getenv("CLASSIFIER_FILTER_CONFIDENCE", "0.5"))
+CLASSIFIER_CONFIDENCE = float(os.getenv("CLASSIFIER_CONFIDENCE", "0.6"))
+CLASSIFIER_LEXICAL_THRESHOLD = float(os.getenv("CLASSIFIER_LEXICAL_THRESHOLD", "0.6"))
+TIER_STATS = {tier: {"count": 0, "total_ms": 0.0} for tier in ("cache", "exact", "lexical", "classifier", "vector")}
+
+# lexical scores are cosine similarities and vector scores distances, both mostly between 0 and 1
+SCORE_BUCKETS = (0.1, 0.2, 0.3, 0.35, 0.4, 0.45, 0.5, 0.55, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 1.0, 1.5, 2.0)
+REQUESTS = registry.counter("ai_server_questions_total", "questions answered per tier", ("tier",))
+REQUEST_SECONDS = registry.histogram("ai_server_question_duration_seconds", "time to answer a question per tier", ("tier",))
+MATCHES = registry.counter(
+    "ai_server_match_total", "best search results accepted (hit) or rejected (miss) by the threshold", ("tier", "result")
+)
+MATCH_SCORE = registry.histogram(
+    "ai_server_match_score", "best score of the lexical (similarity) and vector (distance) searches", ("tier",), SCORE_BUCKETS
+)
+REBUILDS = registry.counter("ai_server_rebuilds_total", "vector store rebuilds per status", ("status",))
+REBUILD_SECONDS = registry.histogram("ai_server_rebuild_duration_seconds", "time to sync the vector store with the dataset")
 
 def normalize(text: str) -> str:
-    text = text.lower().strip()
+    text = text.lower()
     text = re.sub(r"[^\w\s]", "", text)
     text = re.sub(r"\s+", " ", text)
-    return text
+    return text.strip()
 
-def rebuild_vector_store():
+def bump_dataset_version():
     """
-    Rebuild vector store & question map from QA_list.json
+    mark the dataset as changed so no answer computed from the old content is served.
     MUST be called after any dataset change
     """
-    global QUESTION_MAP
+    global DATASET_VERSION
+    DATASET_VERSION += 1
+    answer_cache.clear()
 
-    with open("./background_docs/QA_list.json", "r", encoding="utf-8") as f:
-        content = json.load(f)
-
-    documents = []
+def load_question_map() -> Dict[str, dict]:
+    """
+    build the normalized question -> {id, category, answer} map from QA_list.json
+    """
     question_map = {}
 
-    for item in content:
+    for item in qa_repository.all():
         category = item["category"]
         answer = item["answer"]
 
         for q in item.get("questions", []):
             q_norm = normalize(q)
-            documents.append(q_norm)
             question_map[q_norm] = {
+                "id": item["id"],
                 "category": category,
                 "answer": answer,
             }
+    return question_map
 
-    if vectore_store.vector_store_exists():
-        vectore_store.delete_vector_store()
-
-    vectore_store.create_vector_store(documents)
+def set_question_map(question_map: Dict[str, dict], dataset_hash: str):
+    """
+    swap in a new question map together with the lexical index and the
+    category partitions built from it
 
+    :param dataset_hash: sha256 of the dataset the map was built from
+    """
+    global QUESTION_MAP, LEXICAL_INDEX, CATEGORY_PARTITIONS, DATASET_HASH
+    lexical_index = LexicalIndex(list(question_map))
+    by_category = {}
+    for question, item in question_map.items():
+        by_category.setdefault(item["category"], []).append(question)
+    CATEGORY_PARTITIONS = {category: lexical_index.rows(questions) for category, questions in by_category.items()}
+    LEXICAL_INDEX = lexical_index
     QUESTION_MAP = question_map
+    DATASET_HASH = dataset_hash
+
+async def current_dataset() -> str:
+    """
+    make sure the question map is built from QA_list.json as it is on disk,
+    also after another worker edited it. that costs one stat of the file unless
+    the file changed.
+
+    :return str: sha256 of the dataset the question map is built from
+    """
+    if not QUESTION_MAP or qa_repository.changed() or qa_repository.content_hash != DATASET_HASH:
+        if await run_blocking(reload_question_map):
+            # edited by another worker: its rebuild holds the build lock, so this
+            # one waits for it, finds nothing to embed and then drops the answers
+            # this worker cached from the previous vector store version
+            rebuild_worker.submit(rebuild_vector_store)
+    return DATASET_HASH
+
+def rebuild_vector_store(progress=None):
+    """
+    Build a new vector store version & question map from QA_list.json
+    MUST be called after any dataset change, use schedule_rebuild from request handlers
+
+    :param progress: optional callback receiving the progress between 0 and 1
+    :return dict: added/removed/relabelled/unchanged/embedded paraphrase counts and the active version
+    """
+    start = time.perf_counter()
+    try:
+        # read before the dataset, so an edit in between makes the snapshot stale rather than wrong
+        dataset_hash = qa_repository.dataset_hash()
+        question_map = load_question_map()
+        documents = list(question_map)
+        # stored with every vector so a search result resolves its answer on its own
+        metadatas = [{"qa_id": question_map[q]["id"], "category": question_map[q]["category"]} for q in documents]
+
+        # vectors of a snapshot taken with the same model are not embedded again; the
+        # vector store compares the model recorded with the index on its own
+        snapshot = retrieval_snapshot.load()
+        vectors = snapshot_vectors(snapshot) if snapshot is not None and snapshot["model"] == model.model_name else {}
+
+        # only new or changed paraphrases are embedded, queries keep using the
+        # previous version until the new one is active
+        changes = vectore_store.sync_vector_store(documents, progress=progress, metadatas=metadatas, vectors=vectors)
+    except Exception:
+        REBUILDS.inc(status="failed")
+        raise
+    elapsed = time.perf_counter() - start
+    REBUILDS.inc(status="ok")
+    REBUILD_SECONDS.observe(elapsed)
+    logger.info("vector store synced", extra={"fields": {**changes, "duration_s": round(elapsed, 3)}})
+
+    with _question_map_lock:
+        set_question_map(question_map, dataset_hash)
+        bump_dataset_version()
+    save_snapshot(snapshot, question_map, vectors, dataset_hash, changes["version"])
+    return changes
+
+def snapshot_vectors(snapshot: dict) -> dict:
+    """
+    :param snapshot: snapshot returned by retrieval_snapshot.load
+    :return dict: vector store id -> memory-mapped embedding of every question of the snapshot
+    """
+    embeddings = snapshot["embeddings"]
+    return {doc_id(question): embeddings[i] for i, question in enumerate(snapshot["question_map"])}
+
+def save_snapshot(previous: dict | None, question_map: Dict[str, dict], vectors: dict, dataset_hash: str,
+                  index_version: int | None):
+    """
+    replace the snapshot unless it already describes this dataset, model and
+    vector store version. a failed save only costs the next start some embedding.
+    """
+    if not retrieval_snapshot.enabled:
+        return
+    if previous is not None and (previous["model"], previous["dataset_hash"], previous["index_version"]) == (
+        model.model_name, dataset_hash, index_version
+    ):
+        return
+    try:
+        with span("snapshot_write"):
+            retrieval_snapshot.save(
+                question_map, [vectors[doc_id(q)] for q in question_map], model.model_name, dataset_hash, index_version
+            )
+    except (OSError, KeyError, ValueError) as exc:
+        logger.warning("snapshot not saved", extra={"fields": {"error": str(exc)}})
+
+def reload_question_map() -> bool:
+    """
+    swap in the question map and lexical index of the edited dataset, then
+    invalidate cached answers. no embedding is needed, so the exact and lexical
+    tiers answer from the new content before the vector store is rebuilt.
+    the version is bumped after the swap, so an answer computed from the old
+    map is never cached under the new version.
+
+    :return bool: False if the map was already built from the dataset on disk
+    """
+    with _question_map_lock:
+        # read before the dataset, so an edit in between makes the map stale rather than wrong
+        dataset_hash = qa_repository.dataset_hash()
+        if QUESTION_MAP and dataset_hash == DATASET_HASH:
+            return False
+        set_question_map(load_question_map(), dataset_hash)
+        bump_dataset_version()
+        return True
+
+def schedule_rebuild() -> str:
+    """
+    serve the edited dataset right away and rebuild the vector store in the background.
+    blocking, call it through run_blocking from request handlers.
+
+    :return str: rebuild job id
+    """
+    reload_question_map()
+    return rebuild_worker.submit(rebuild_vector_store)
+
+def warm_up_vector_store():
+    """
+    restore the question map from the snapshot and load the active vector
+    store version when the snapshot was taken from the current dataset with the
+    current model and that version is still active. otherwise sync the vector
+    store with the dataset, which only embeds what the snapshot and the vector
+    store do not already hold.
+    """
+    with span("snapshot_read"):
+        snapshot = retrieval_snapshot.load()
+    if (
+        snapshot is not None
+        and snapshot["model"] == model.model_name
+        and snapshot["dataset_hash"] == qa_repository.dataset_hash()
+        and snapshot["index_version"] == vectore_store.active_version()
+        and vectore_store.stored_model() == model.model_name
+    ):
+        with _question_map_lock:
+            set_question_map(snapshot["question_map"], snapshot["dataset_hash"])
+        vectore_store.load_vector_store()
+        logger.info("warm start from snapshot", extra={"fields": {
+            "questions": snapshot["questions"], "version": snapshot["index_version"],
+        }})
+        return
+    rebuild_vector_store()
+
+readiness.register(f"embedding:{model.model_name}", lambda: model.warm_up(WARMUP_PROBE))
+readiness.register(f"vector_store:{vectore_store.backend_name}", warm_up_vector_store, vectore_store.health)
+readiness.register("classifier", question_classifier.load)
+
+# read at scrape time from the same counters the *_stats endpoints return
+registry.gauge("ai_server_sessions", "live chat sessions", fn=lambda: session_chats.stats()["live_sessions"])
+registry.gauge("ai_server_session_bytes", "bytes held by the chat sessions", fn=lambda: session_chats.stats()["bytes_held"])
+registry.gauge(
+    "ai_server_requests", "questions in flight and waiting for a slot in the request limiter", ("state",),
+    fn=lambda: {("in_flight",): request_limiter.in_flight, ("waiting",): request_limiter.waiting},
+)
+registry.gauge(
+    "ai_server_requests_rejected", "questions rejected or timed out by the request limiter", ("reason",),
+    fn=lambda: {("rejected",): request_limiter.rejected, ("timed_out",): request_limiter.timed_out},
+)
+registry.gauge(
+    "ai_server_cache", "entries, hits, misses and evictions of the answer and embedding caches", ("cache", "stat"),
+    fn=lambda: {
+        (cache, stat): value
+        for cache, stats in (("answer", answer_cache.stats()), ("embedding", model.embedding_cache.memory.stats()))
+        for stat, value in stats.items()
+    },
+)
+registry.gauge(
+    "ai_server_embed_scheduler", "batch and queue wait statistics of the embedding scheduler", ("stat",),
+    fn=lambda: {(stat,): value for stat, value in embedding_scheduler.stats().items()},
+)
+registry.gauge("ai_server_dataset_version", "answers cached under an older version are not served", fn=lambda: DATASET_VERSION)
 
 
 @routers.post("/ask")
@@ -59,41 +310,352 @@ async def ask_question(request: RequestModel):
     ask a question and get an answer based on the qa_list.
     
     :param requestModel: user_id and question
-    :return str: standard answer based on the qa_list
+    :return dict: category, answer and the tier which answered (cache, exact, lexical, classifier or vector)
+    """
+    return await request_limiter.run(handle_question(request))
+
+async def handle_question(request: RequestModel) -> dict:
+    start = time.perf_counter()
+    with traced() as trace:
+        with span("normalize"):
+            question = normalize(request.question)
+        version = DATASET_VERSION
+        cache_key = (question, await current_dataset())
+        with span("answer_cache"):
+            cached = answer_cache.get(cache_key)
+        if cached is not None:
+            result = {**cached, "tier": "cache"}
+        else:
+            result = await answer_question(question)
+            # only cache it if the question map or vector store was not swapped in the meantime
+            if version == DATASET_VERSION:
+                answer_cache.put(cache_key, result)
+
+        if request.user_id:
+            with span("session"):
+                session_chats.append(request.user_id, request.question, result["answer"])
+
+    elapsed = time.perf_counter() - start
+    tier = result["tier"]
+    stats = TIER_STATS[tier]
+    stats["count"] += 1
+    stats["total_ms"] += elapsed * 1000
+    REQUESTS.inc(tier=tier)
+    REQUEST_SECONDS.observe(elapsed, tier=tier)
+    logger.debug("question answered", extra={"fields": {
+        "tier": tier,
+        "answered": bool(result["answer"]),
+        "duration_ms": round(elapsed * 1000, 3),
+        "stages_ms": {stage: round(seconds * 1000, 3) for stage, seconds in trace.items()},
+    }})
+    return result
+
+async def answer_question(question: str) -> dict:
+    """
+    find the answer of a normalized question. tries an exact lookup in the
+    question map, then the lexical index, then a lexical match within the
+    category predicted by the classifier, and only falls back to the embedding
+    search (narrowed to the predicted category) when none is confident.
+
+    :param question: normalized user question
+    :return dict: category, answer and tier, answer is empty if nothing matched
+    """
+    matched, tier, categories = match_without_embedding(question)
+    if matched:
+        return {"category": matched["category"], "answer": matched["answer"], "tier": tier}
+
+    # concurrent questions are embedded together by the scheduler
+    with span("embed"):
+        question_embedding = await embedding_scheduler.embed(question)
+    matched = await vector_match(question, question_embedding, categories)
+    if not matched:
+        category = categories[0] if categories else await assign_category(question_embedding)
+        return {"category": category, "answer": "", "tier": "vector"}
+    return {"category": matched["category"], "answer": matched["answer"], "tier": "vector"}
+
+def match_without_embedding(question: str) -> tuple[dict | None, str, list[str]]:
+    """
+    the tiers which answer without calling Ollama: exact lookup in the question
+    map, the lexical index, then a lexical match within the categories predicted
+    by the classifier.
+
+    :param question: normalized user question
+    :return tuple: matched qa entry with its question and score (None when the embedding
+        search is needed), the tier and the categories predicted by the classifier
+    """
+    with span("exact"):
+        matched = QUESTION_MAP.get(question)
+    if matched:
+        return {**matched, "question": question, "score": 1.0}, "exact", []
+
+    with span("lexical"):
+        matched = lexical_match(question)
+    if matched:
+        return matched, "lexical", []
+
+    with span("classifier"):
+        categories, confidence = predict_categories(question)
+        if categories and confidence >= CLASSIFIER_CONFIDENCE:
+            matched = lexical_match(question, categories, CLASSIFIER_LEXICAL_THRESHOLD)
+    return matched, "classifier", categories
+
+def predict_categories(question: str) -> tuple[list[str], float]:
+    """
+    QA categories predicted by the classifier, empty below CLASSIFIER_FILTER_CONFIDENCE.
+
+    :param question: normalized user question
+    :return tuple: predicted QA categories (most likely first) and the classifier probability
     """
-    question = normalize(request.question)
+    prediction = question_classifier.predict(question)
+    if prediction is None or prediction[1] < CLASSIFIER_FILTER_CONFIDENCE:
+        return [], 0.0
+    label, confidence = prediction
+    return [c for c in question_classifier.qa_categories(label) if c in CATEGORY_PARTITIONS], confidence
 
-    if not vectore_store.vector_store_exists():
-        rebuild_vector_store()
+async def assign_category(question_embedding: list) -> str:
+    """
+    category of a question without an answer, read from the category index
+    with the embedding already computed for retrieval.
 
-    vectore_store_instance = vectore_store.get_vector_store()
+    :param question_embedding: embedding of the normalized question
+    :return str: category, "unknown", or "" when the embedding cannot be reused
+    """
+    return (await assign_categories([question_embedding]))[0]
 
-    results = vectore_store_instance.similarity_search_with_score(
-        question,
-        k=3
-    )
+async def assign_categories(question_embeddings: list) -> list[str]:
+    """
+    :param question_embeddings: embeddings of normalized questions
+    :return list: category, "unknown", or "" when the embedding cannot be reused, per question
+    """
+    if not REUSE_QUESTION_EMBEDDING:
+        return [""] * len(question_embeddings)
+    category_index = await run_blocking(get_category_index)
+    await run_blocking(category_index.ensure_loaded)
+    return category_index.assign(normalize_rows(question_embeddings))
+
+def lexical_match(question: str, categories: list[str] | None = None,
+                  threshold: float = LEXICAL_THRESHOLD) -> dict | None:
+    """
+    return the qa entry of the closest stored question if the lexical index is confident.
 
+    :param question: normalized user question
+    :param categories: only match paraphrases of these categories, all paraphrases if None
+    :param threshold: lowest accepted cosine similarity
+    :return dict|None: matched category and answer, with the matched question and its similarity
+    """
+    question_map, lexical_index, partitions = QUESTION_MAP, LEXICAL_INDEX, CATEGORY_PARTITIONS
+    rows = None
+    if categories is not None:
+        rows = np.concatenate([partitions[c] for c in categories if c in partitions] or [np.zeros(0, dtype=np.int64)])
+    results = lexical_index.search(question, k=2, rows=rows)
+    tier = "lexical" if categories is None else "classifier"
+    if results:
+        MATCH_SCORE.observe(results[0][1], tier=tier)
+    if not results or results[0][1] < threshold:
+        MATCHES.inc(tier=tier, result="miss")
+        return None
+    MATCHES.inc(tier=tier, result="hit")
+    best = question_map.get(results[0][0])
+    if best is None:
+        return None
+    if len(results) > 1:
+        runner_up = question_map.get(results[1][0])
+        if runner_up and runner_up["answer"] != best["answer"] and results[0][1] - results[1][1] < LEXICAL_MARGIN:
+            return None
+    return {**best, "question": results[0][0], "score": results[0][1]}
+
+async def vector_match(question: str, question_embedding: list | None = None,
+                       categories: list[str] | None = None) -> dict | None:
+    """
+    return the qa entry of the closest stored question in the vector store.
+
+    :param question: normalized user question
+    :param question_embedding: embedding of the question if it is already computed
+    :param categories: search the paraphrases of these categories first
+    :return dict|None: matched category and answer
+    """
+    if categories:
+        results = await search_vector_store(question, k=3, question_embedding=question_embedding, categories=categories)
+        matched = best_vector_match(question, results)
+        if matched:
+            return matched
+        # the prediction may be wrong, so a miss in its categories searches everything
+    results = await search_vector_store(question, k=3, question_embedding=question_embedding)
+    return best_vector_match(question, results)
+
+def best_vector_match(question: str, results: list) -> dict | None:
+    """
+    :param question: normalized user question
+    :param results: (Document, distance) pairs of the vector search
+    :return dict|None: qa entry of the closest result with its question and distance, if it is within the threshold
+    """
     if not results:
-        return {"category": "", "answer": ""}
+        return None
 
     best_doc, best_score = min(results, key=lambda x: x[1])
 
     threshold = 0.4 if len(question.split()) < 6 else 0.45
 
-    print(f"[DEBUG] Best score: {best_score} | Threshold: {threshold}")
+    MATCH_SCORE.observe(best_score, tier="vector")
+    logger.debug("vector match", extra={"fields": {"best_score": best_score, "threshold": threshold}})
 
     if best_score >= threshold:
-        return {"category": "", "answer": ""}
+        MATCHES.inc(tier="vector", result="miss")
+        return None
+    MATCHES.inc(tier="vector", result="hit")
 
-    matched_question = best_doc.page_content
-    matched = QUESTION_MAP.get(matched_question)
+    matched = resolve_document(best_doc)
+    if matched is None:
+        return None
+    return {**matched, "question": best_doc.page_content, "score": best_score}
 
-    if not matched:
-        return {"category": "", "answer": ""}
+def resolve_document(document) -> dict | None:
+    """
+    qa entry of a search result, read through the qa_id stored with the vector.
+    the item is only trusted while the paraphrase still belongs to it: until the
+    rebuild after an edit is active, the stored qa_id may point at an item whose
+    questions changed, or at another item once a delete renumbered the ids.
+    those vectors, and vectors stored without metadata, are looked up in the
+    question map.
+
+    :param document: Document returned by the vector search
+    :return dict|None: category and answer, None if the qa item no longer exists
+    """
+    qa_id = document.metadata.get("qa_id", -1)
+    if qa_id is not None and qa_id >= 0:
+        item = qa_repository.get(qa_id)
+        if item is not None and any(normalize(q) == document.page_content for q in item.get("questions", [])):
+            return {"id": item["id"], "category": item["category"], "answer": item["answer"]}
+    return QUESTION_MAP.get(document.page_content)
+
+async def search_vector_store(question: str, k: int, question_embedding: list | None = None,
+                              categories: list[str] | None = None) -> list:
+    """
+    embed a normalized question and search the vector store without blocking the event loop.
+
+    :param question: normalized user question
+    :param k: number of results
+    :param question_embedding: embedding of the question if it is already computed
+    :param categories: only search the paraphrases of these categories, all paraphrases if None
+    :return list: (Document, distance) pairs
+    """
+    if not await run_blocking(vectore_store.vector_store_exists):
+        await run_blocking(rebuild_vector_store)
+
+    if question_embedding is None:
+        # concurrent questions are embedded together by the scheduler
+        with span("embed"):
+            question_embedding = await embedding_scheduler.embed(question)
+    with span("vector_search"):
+        return await run_blocking(vectore_store.search_by_vector, question_embedding, k, None, categories)
+
+@routers.post("/ask_batch")
+async def ask_batch(request: BatchRequestModel):
+    """
+    answer a list of questions in one round trip, e.g. to test a dataset or to
+    replay logged questions. questions which the exact, lexical and classifier
+    tiers cannot answer are embedded in one call and searched with one
+    multi-vector search over every paraphrase. no chat history is recorded.
+
+    :param request: questions
+    :return list: category, answer, score, matched_question and tier of every question, in order.
+        score is the similarity for the exact (1.0), lexical and classifier tiers and
+        the distance for the vector tier
+    """
+    if len(request.questions) > MAX_BATCH_QUESTIONS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_QUESTIONS} questions per batch.")
+    return await batch_limiter.run(answer_questions(request.questions))
 
+def batch_result(matched: dict | None, tier: str, category: str = "", score: float | None = None) -> dict:
+    if matched is None:
+        return {"category": category, "answer": "", "score": score, "matched_question": None, "tier": tier}
     return {
         "category": matched["category"],
         "answer": matched["answer"],
+        "score": matched["score"],
+        "matched_question": matched["question"],
+        "tier": tier,
+    }
+
+async def answer_questions(questions: list[str]) -> list[dict]:
+    """
+    :param questions: user questions
+    :return list: batch result of every question, in order
+    """
+    start = time.perf_counter()
+    await current_dataset()
+    with span("normalize"):
+        normalized = [normalize(q) for q in questions]
+
+    answers, pending = {}, {}
+    # repeated questions are answered once
+    for question in dict.fromkeys(normalized):
+        if not question:
+            answers[question] = batch_result(None, "vector")
+            continue
+        matched, tier, categories = match_without_embedding(question)
+        if matched:
+            answers[question] = batch_result(matched, tier)
+        else:
+            pending[question] = categories
+    if pending:
+        answers.update(await vector_match_many(pending))
+
+    for question in normalized:
+        REQUESTS.inc(tier=answers[question]["tier"])
+    logger.debug("batch answered", extra={"fields": {
+        "questions": len(questions),
+        "unique": len(answers),
+        "embedded": len(pending),
+        "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+    }})
+    return [answers[question] for question in normalized]
+
+async def vector_match_many(pending: Dict[str, list]) -> Dict[str, dict]:
+    """
+    embed the questions with one call and search them with one multi-vector search.
+
+    :param pending: normalized question -> categories predicted by the classifier
+    :return dict: normalized question -> batch result
+    """
+    if not await run_blocking(vectore_store.vector_store_exists):
+        await run_blocking(rebuild_vector_store)
+    questions = list(pending)
+    with span("embed"):
+        embeddings = await run_blocking(embedding_model.embed_documents, questions)
+    with span("vector_search"):
+        results = await run_blocking(vectore_store.search_by_vectors, embeddings, 3)
+
+    answers, unanswered = {}, []
+    for i, (question, hits) in enumerate(zip(questions, results)):
+        matched = best_vector_match(question, hits)
+        if matched:
+            answers[question] = batch_result(matched, "vector")
+        else:
+            unanswered.append(i)
+    # the categories of unanswered questions without a prediction come from one category index call
+    unpredicted = [i for i in unanswered if not pending[questions[i]]]
+    assigned = dict(zip(unpredicted, await assign_categories([embeddings[i] for i in unpredicted]))) if unpredicted else {}
+    for i in unanswered:
+        question = questions[i]
+        category = pending[question][0] if pending[question] else assigned[i]
+        score = min(score for _, score in results[i]) if results[i] else None
+        answers[question] = batch_result(None, "vector", category, score)
+    return answers
+
+@routers.get("/match_stats")
+async def get_match_stats():
+    """
+    return how many questions each tier answered and their mean latency.
+
+    :return dict: count and mean latency in ms per tier
+    """
+    return {
+        tier: {
+            "count": stats["count"],
+            "mean_ms": stats["total_ms"] / stats["count"] if stats["count"] else 0.0,
+        }
+        for tier, stats in TIER_STATS.items()
     }
 
 @routers.get("/most_relevant")
@@ -104,19 +666,39 @@ async def get_most_relevant(question: str):
     :param str: question string from user
     :return dict: most relevant question and similarity score
     """
-    with open('./background_docs/QA_list.json','r',encoding='utf-8') as f:
-        content = json.load(f)
+    return await request_limiter.run(find_most_relevant(question))
 
-    if vectore_store.vector_store_exists():
-        vectore_store_instance = vectore_store.get_vector_store()
-    else:
-        vectore_store_instance = vectore_store.create_vector_store([item.get("question") for item in content])
-    result = vectore_store_instance.similarity_search_with_score(question, k=1)
+async def find_most_relevant(question: str) -> dict:
+    result = await search_vector_store(normalize(question), k=1)
+    if not result:
+        return {"message": "No question found in the vector store."}
     return {
         "most_relevant_question": result[0][0].page_content,
         "similarity_score": result[0][1]
     }
 
+@routers.get("/cache_stats")
+async def get_cache_stats():
+    """
+    return hit/miss/eviction counters of the embedding and answer caches.
+
+    :return dict: cache statistics
+    """
+    return {
+        "embedding": model.embedding_cache.stats(),
+        "answer": {**answer_cache.stats(), "dataset_version": DATASET_VERSION},
+    }
+
+@routers.get("/scheduler_stats")
+async def get_scheduler_stats():
+    """
+    return batch fill and queue wait statistics of the embedding scheduler
+    and the in-flight/waiting/rejected counters of the request limiter.
+
+    :return dict: scheduler statistics
+    """
+    return {**embedding_scheduler.stats(), "requests": request_limiter.stats()}
+
 @routers.get("/history")
 async def get_chat_history(user_id: str):
     """
@@ -125,12 +707,21 @@ async def get_chat_history(user_id: str):
     :param user_id: user's unique identifier
     :return dict: user's chat history or message if no history found
     """
-    if user_id in session_chats:
-        chat_instance = session_chats[user_id]
+    chat_instance = await run_blocking(session_chats.get, user_id)
+    if chat_instance is not None:
         return chat_instance.get_history()
     else:
         return {"message": "No chat history found for this user."}
-    
+
+@routers.get("/session_stats")
+async def get_session_stats():
+    """
+    return live sessions, bytes held and eviction/expiry counters of the session store.
+
+    :return dict: session store statistics
+    """
+    return await run_blocking(session_chats.stats)
+
 @routers.get('/index')
 async def check_index():
     """
@@ -138,9 +729,7 @@ async def check_index():
     because this index will be used for add feature. So the index of new qa item
     is latest index of dataset plus one.
     """
-    with open('./background_docs/QA_list.json','r',encoding='utf-8') as f:
-        content = json.load(f)
-    return len(content)+1   
+    return qa_repository.next_id()
 
 @routers.get('/reset')
 async def reset_chat_history(user_id: str):
@@ -150,23 +739,61 @@ async def reset_chat_history(user_id: str):
     :param user_id: user's unique identifier
     :return dict: chat history before reset or message if no history found
     """
-    if user_id in session_chats:
-        chat_history = session_chats[user_id].get_history()
-        del session_chats[user_id]
-        return chat_history
+    chat_instance = await run_blocking(session_chats.pop, user_id)
+    if chat_instance is not None:
+        return chat_instance.get_history()
     else:
         return {"message": "No chat history found for this user."}
     
 @routers.get('/get_all_qa')
-async def get_qa_list():
+async def get_qa_list(req:Request):
     """
-    retrieve the entire QA list from the qa_list
+    retrieve the entire QA list from the qa_list.
+    the body is pre-serialized per dataset version, supports If-None-Match (304)
+    and gzip when the client accepts it.
 
     :return dict: the entire QA list
     """
-    with open('./background_docs/QA_list.json','r',encoding='utf-8') as f:
-            content = json.load(f)
-    return content
+    body, gzip_body, etag = qa_repository.all_serialized()
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(req.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if accepts_gzip(req.headers.get("accept-encoding")):
+        headers["Content-Encoding"] = "gzip"
+        return Response(gzip_body, media_type="application/json", headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    """
+    :param accept_encoding: value of the Accept-Encoding header
+    :return bool: True if gzip (or *) is listed with a non-zero q-value
+    """
+    if not accept_encoding:
+        return False
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding.strip().lower()] = q
+    return weights.get("gzip", weights.get("*", 0.0)) > 0
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    :param if_none_match: value of the If-None-Match header
+    :param etag: current ETag
+    :return bool: True if the client already has the current version
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
 
 @routers.get('/get_one_qa')
 async def get_one_qa(req:Request):
@@ -176,11 +803,9 @@ async def get_one_qa(req:Request):
     :return dict: the specific qa item. else return fail message 
     """
     query = await req.json()
-    qa_id = query["id"]
-    with open('./background_docs/QA_list.json','r',encoding='utf-8') as f:
-        for item in json.load(f):
-            if item["id"] == qa_id:
-                return item
+    item = qa_repository.get(query["id"])
+    if item is not None:
+        return item
     return {"message":"Not find the qa item"}
 
 @routers.put('/update_qa')
@@ -192,25 +817,12 @@ async def update_qa_list(req:Request):
     :return dict: success message
     """
     new_qa = await req.json()
-    
-    with open('./background_docs/QA_list.json','r',encoding='utf-8') as f:
-        content = json.load(f)
 
-    if new_qa["id"] not in {qa["id"] for qa in content}:
+    if not await run_blocking(qa_repository.update, new_qa):
         return {"message":"the update index not in dataset"}
-    
-    for qa in content:
-        if qa["id"] == new_qa["id"]:
-            qa["category"] = new_qa["category"]
-            qa["questions"] = new_qa["questions"]
-            qa["answer"] = new_qa["answer"]
-            qa["common"] = new_qa["common"]
 
-    with open('./background_docs/QA_list.json','w',encoding='utf-8') as f:
-        json.dump(content, f, ensure_ascii=False, indent=4)
-
-    rebuild_vector_store()
-    return {"message": "Updated successfully.", "new_question": new_qa}
+    job_id = await run_blocking(schedule_rebuild)
+    return {"message": "Updated successfully.", "new_question": new_qa, "job_id": job_id}
 
 
 
@@ -224,18 +836,11 @@ async def add_new_qa(req:Request):
     """
     new_qa = await req.json()
 
-    with open('./background_docs/QA_list.json','r',encoding='utf-8') as f:
-        content = json.load(f)
-
-    if new_qa["id"] != len(content) + 1:
+    if not await run_blocking(qa_repository.add, new_qa):
         return {"message": "index error"}
-    
-    content.append(new_qa)
-    with open('./background_docs/QA_list.json','w',encoding='utf-8') as f:
-        json.dump(content, f, ensure_ascii=False, indent=4)
 
-    rebuild_vector_store()
-    return {"message": "Add new item successfully.", "new_question": new_qa}
+    job_id = await run_blocking(schedule_rebuild)
+    return {"message": "Add new item successfully.", "new_question": new_qa, "job_id": job_id}
 
 @routers.delete('/del')
 async def del_qa(req:Request):
@@ -246,18 +851,23 @@ async def del_qa(req:Request):
     :return dic: success message
     """
     del_qa = await req.json()
-    with open('./background_docs/QA_list.json','r',encoding='utf-8') as f:
-        content = json.load(f)
-    if del_qa["id"] not in {qa["id"] for qa in content}:
+    if not await run_blocking(qa_repository.delete, del_qa["id"]):
         return {"message":"the update index not in dataset"}
-    drop_id = del_qa["id"]
-    content = [item for item in content if item["id"] != drop_id]
-    for new_id, item in enumerate(content, start=1):
-        item['id'] = new_id
-    with open('./background_docs/QA_list.json','w',encoding='utf-8') as f:
-        json.dump(content, f, ensure_ascii=False, indent=4)
-    vectore_store.update_vector_store([item.get("question") for item in content])
-    return {"message": "Delete item successfully."}
+    job_id = await run_blocking(schedule_rebuild)
+    return {"message": "Delete item successfully.", "job_id": job_id}
+
+@routers.get('/rebuild_status')
+async def get_rebuild_status(job_id: str | None = None):
+    """
+    return the status of a vector store rebuild job.
+
+    :param job_id: job id returned by an edit endpoint, the latest job if omitted
+    :return dict: job status, progress, duration and the active vector store version
+    """
+    job = rebuild_worker.get(job_id)
+    if job_id is not None and job is None:
+        return {"message": "Not find the rebuild job", "active_version": vectore_store.active_version()}
+    return {"job": job, "active_version": vectore_store.active_version()}
 
 @routers.delete('/delete_vector_store')
 async def delete_vector_store():
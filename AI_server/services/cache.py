@@ -0,0 +1,173 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    bounded in-memory map which evicts the least recently used entry when full.
+    keeps hit/miss/eviction counters so the cache can be sized from real traffic.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(1, int(max_entries))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class EmbeddingCache:
+    """
+    content-addressed cache of embedding vectors.
+
+    the key is a sha256 of the model name plus the (already normalized) text, so
+    the same text embedded by another model never collides. lookups go to the
+    in-memory LRU tier first and then to the optional sqlite tier on disk, which
+    survives restarts and is shared by the workers of a host (WAL mode). the disk
+    tier keeps at most max_disk_entries rows, the oldest writes are evicted first.
+    """
+
+    def __init__(self, model_name: str, max_entries: int = 4096, disk_path: str | None = None,
+                 max_disk_entries: int = 100000):
+        self.model_name = model_name
+        self.memory = LRUCache(max_entries)
+        self.disk_path = disk_path or None
+        self.max_disk_entries = max(1, int(max_disk_entries))
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.disk_evictions = 0
+        # rows in the file as last counted plus the rows this process wrote since
+        self._disk_rows = 0
+        self._disk = None
+        self._disk_lock = threading.Lock()
+        if self.disk_path:
+            self._open_disk()
+
+    def _open_disk(self):
+        directory = os.path.dirname(self.disk_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._disk = sqlite3.connect(self.disk_path, check_same_thread=False, timeout=30)
+        self._disk.execute("PRAGMA journal_mode=WAL")
+        self._disk.execute("PRAGMA synchronous=NORMAL")
+        self._disk.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, model TEXT, vector BLOB)"
+        )
+        self._disk.commit()
+        (self._disk_rows,) = self._disk.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str):
+        """
+        return the cached vector of the text or None.
+
+        :param text: normalized text
+        :return list|None: embedding vector
+        """
+        key = self.key(text)
+        vector = self.memory.get(key)
+        if vector is not None or self._disk is None:
+            return vector
+        with self._disk_lock:
+            row = self._disk.execute(
+                "SELECT vector FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            self.disk_misses += 1
+            return None
+        self.disk_hits += 1
+        vector = array("f", row[0]).tolist()
+        self.memory.put(key, vector)
+        return vector
+
+    def put(self, text: str, vector):
+        self.put_many([text], [vector])
+
+    def put_many(self, texts, vectors):
+        rows = []
+        for text, vector in zip(texts, vectors):
+            key = self.key(text)
+            vector = list(vector)
+            self.memory.put(key, vector)
+            rows.append((key, self.model_name, array("f", vector).tobytes()))
+        if self._disk is None or not rows:
+            return
+        with self._disk_lock:
+            with self._disk:
+                self._disk.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model, vector) VALUES (?, ?, ?)", rows
+                )
+                self._disk_rows += len(rows)
+                if self._disk_rows > self.max_disk_entries:
+                    self._evict_disk()
+
+    def _evict_disk(self):
+        """drop the oldest rows over the cap, a replaced row counts as new (it gets a new rowid)"""
+        # the estimate also misses rows written by other workers, so count before deleting
+        (rows,) = self._disk.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = rows - self.max_disk_entries
+        if excess > 0:
+            self._disk.execute(
+                "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY rowid LIMIT ?)",
+                (excess,),
+            )
+            self.disk_evictions += excess
+            rows -= excess
+        self._disk_rows = rows
+
+    def stats(self):
+        stats = {"model": self.model_name, "memory": self.memory.stats()}
+        if self._disk is not None:
+            with self._disk_lock:
+                (entries,) = self._disk.execute(
+                    "SELECT COUNT(*) FROM embeddings WHERE model = ?", (self.model_name,)
+                ).fetchone()
+            stats["disk"] = {
+                "path": self.disk_path,
+                "entries": entries,
+                "max_entries": self.max_disk_entries,
+                "hits": self.disk_hits,
+                "misses": self.disk_misses,
+                "evictions": self.disk_evictions,
+            }
+        return stats
@@ -0,0 +1,315 @@
+import threading
+import time
+import numpy as np
+from services.utils import normalize_rows
+
+
+class CategoryIndex:
+    """
+    l2-normalized embedding matrices of the categories and the stored questions.
+
+    both are embedded once, adding or removing a category only embeds or drops
+    that one row. classifying a question is then one matrix-vector product and
+    an argmax, because the cosine similarity of normalized rows is their dot product.
+
+    it also keeps a materialized count table for the stored questions: the best
+    category and score of every question, how many questions each label gets,
+    and how many questions reach the threshold for each category. changes only
+    recompute the rows they can affect.
+    """
+
+    def __init__(self, embedding_model, categories: list[str], questions: list[str], threshold: float):
+        self.embedding_model = embedding_model
+        # names and matrices are swapped together so readers never see them out of step
+        self.category_state = (list(categories), None)
+        self.question_state = (list(questions), None)
+        self.threshold = threshold
+        self.best_category = []
+        self.best_score = np.zeros(0, dtype=np.float32)
+        self.counts = {}
+        self.above_counts = {}
+        self.counts_version = 0
+        self.counts_updated_at = None
+        self._lock = threading.RLock()
+
+    @property
+    def categories(self) -> list[str]:
+        return self.category_state[0]
+
+    @property
+    def category_matrix(self) -> np.ndarray | None:
+        return self.category_state[1]
+
+    @property
+    def questions(self) -> list[str]:
+        return self.question_state[0]
+
+    @property
+    def question_matrix(self) -> np.ndarray | None:
+        return self.question_state[1]
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """
+        :param texts: texts to embed
+        :return np.ndarray: l2-normalized embeddings, one row per text
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return normalize_rows(self.embedding_model.embed_documents(list(texts)))
+
+    def ensure_loaded(self):
+        """embed the categories and questions and fill the count table if that has not happened yet"""
+        if self.category_matrix is not None and self.question_matrix is not None:
+            return
+        with self._lock:
+            if self.category_matrix is None:
+                self.category_state = (self.categories, self.embed(self.categories))
+            if self.question_matrix is None:
+                self.question_state = (self.questions, self.embed(self.questions))
+                self._recount()
+
+    def is_empty(self) -> bool:
+        self.ensure_loaded()
+        return len(self.categories) == 0 or len(self.questions) == 0
+
+    def _label(self, category: str | None, score: float) -> str:
+        return category if category is not None and score >= self.threshold else "unknown"
+
+    def _similarity(self, question_matrix: np.ndarray) -> np.ndarray:
+        categories, category_matrix = self.category_state
+        if len(question_matrix) == 0 or len(categories) == 0:
+            return np.zeros((len(question_matrix), len(categories)), dtype=np.float32)
+        return question_matrix @ category_matrix.T
+
+    def _best(self, sim: np.ndarray) -> tuple[list, np.ndarray]:
+        if sim.shape[1] == 0:
+            return [None] * sim.shape[0], np.full(sim.shape[0], -np.inf, dtype=np.float32)
+        best = sim.argmax(axis=1)
+        categories = self.categories
+        return [categories[i] for i in best], sim[np.arange(len(best)), best]
+
+    def _touch(self):
+        self.counts_version += 1
+        self.counts_updated_at = time.time()
+
+    def _recount(self):
+        """full recomputation, only used when the index is first loaded"""
+        sim = self._similarity(self.question_matrix)
+        self.best_category, self.best_score = self._best(sim)
+        counts = {}
+        for category, score in zip(self.best_category, self.best_score):
+            label = self._label(category, score)
+            counts[label] = counts.get(label, 0) + 1
+        self.counts = counts
+        above = np.count_nonzero(sim >= self.threshold, axis=0)
+        self.above_counts = {category: int(n) for category, n in zip(self.categories, above)}
+        self._touch()
+
+    def _move(self, rows, categories, scores):
+        """change the best category of some questions and keep the label counts in step"""
+        counts = dict(self.counts)
+        for row, category, score in zip(rows, categories, scores):
+            old = self._label(self.best_category[row], self.best_score[row])
+            counts[old] -= 1
+            if counts[old] == 0:
+                del counts[old]
+            self.best_category[row] = category
+            self.best_score[row] = score
+            new = self._label(category, score)
+            counts[new] = counts.get(new, 0) + 1
+        self.counts = counts
+
+    def add_category(self, category: str):
+        """
+        embed only the new category. only questions for which it scores higher
+        than their current best category change.
+
+        :param category: new category
+        :return bool: False if the category is already in the index
+        """
+        self.ensure_loaded()
+        if category in self.categories:
+            return False
+        row = self.embed([category])
+        with self._lock:
+            categories, matrix = self.category_state
+            if category in categories:
+                return False
+            matrix = row if matrix.size == 0 else np.vstack([matrix, row])
+            self.category_state = (categories + [category], matrix)
+
+            column = self.question_matrix @ row[0] if len(self.questions) else np.zeros(0, dtype=np.float32)
+            self.above_counts = {**self.above_counts, category: int(np.count_nonzero(column >= self.threshold))}
+            self.best_category = list(self.best_category)
+            self.best_score = self.best_score.copy()
+            rows = np.flatnonzero(column > self.best_score)
+            self._move(rows, [category] * len(rows), column[rows])
+            self._touch()
+        return True
+
+    def remove_category(self, category: str):
+        """
+        drop the category row, nothing is embedded. only questions whose best
+        category it was are compared with the remaining categories again.
+
+        :param category: category to drop
+        :return bool: False if the category is not in the index
+        """
+        self.ensure_loaded()
+        with self._lock:
+            categories, matrix = self.category_state
+            if category not in categories:
+                return False
+            index = categories.index(category)
+            self.category_state = (categories[:index] + categories[index + 1:], np.delete(matrix, index, axis=0))
+
+            above_counts = dict(self.above_counts)
+            above_counts.pop(category, None)
+            self.above_counts = above_counts
+            self.best_category = list(self.best_category)
+            self.best_score = self.best_score.copy()
+            rows = [i for i, best in enumerate(self.best_category) if best == category]
+            if rows:
+                new_categories, new_scores = self._best(self._similarity(self.question_matrix[rows]))
+                self._move(rows, new_categories, new_scores)
+            self._touch()
+        return True
+
+    def add_questions(self, questions: list[str]):
+        """
+        embed only the new questions and add them to the count table.
+
+        :param questions: new questions
+        """
+        self.ensure_loaded()
+        rows = self.embed(questions)
+        with self._lock:
+            names, matrix = self.question_state
+            matrix = rows if matrix.size == 0 else np.vstack([matrix, rows])
+            self.question_state = (names + list(questions), matrix)
+
+            sim = self._similarity(rows)
+            best_category, best_score = self._best(sim)
+            self.best_category = list(self.best_category) + best_category
+            self.best_score = np.concatenate([self.best_score, best_score])
+            counts = dict(self.counts)
+            for category, score in zip(best_category, best_score):
+                label = self._label(category, score)
+                counts[label] = counts.get(label, 0) + 1
+            self.counts = counts
+            above = np.count_nonzero(sim >= self.threshold, axis=0)
+            self.above_counts = {
+                category: self.above_counts.get(category, 0) + int(n)
+                for category, n in zip(self.categories, above)
+            }
+            self._touch()
+
+    def remove_questions(self, questions: list[str]):
+        """
+        drop the questions from the index and the count table, nothing is embedded.
+
+        :param questions: questions to drop
+        """
+        self.ensure_loaded()
+        with self._lock:
+            names, matrix = self.question_state
+            drop = set(questions)
+            rows = [i for i, name in enumerate(names) if name in drop]
+            if not rows:
+                return
+            sim = self._similarity(matrix[rows])
+            counts = dict(self.counts)
+            for row in rows:
+                label = self._label(self.best_category[row], self.best_score[row])
+                counts[label] -= 1
+                if counts[label] == 0:
+                    del counts[label]
+            self.counts = counts
+            above = np.count_nonzero(sim >= self.threshold, axis=0)
+            self.above_counts = {
+                category: self.above_counts.get(category, 0) - int(n)
+                for category, n in zip(self.categories, above)
+            }
+            dropped = set(rows)
+            keep = [i for i in range(len(names)) if i not in dropped]
+            self.question_state = ([names[i] for i in keep], matrix[keep])
+            self.best_category = [self.best_category[i] for i in keep]
+            self.best_score = self.best_score[keep]
+            self._touch()
+
+    def assign_with_scores(self, question_matrix: np.ndarray) -> tuple[list[str], np.ndarray]:
+        """
+        return the best category of every row, or "unknown" below the threshold,
+        together with the best similarity.
+
+        :param question_matrix: l2-normalized question embeddings
+        :return tuple: category per question and best similarity per question
+        """
+        categories, category_matrix = self.category_state
+        if len(question_matrix) == 0:
+            return [], np.zeros(0, dtype=np.float32)
+        if len(categories) == 0:
+            return ["unknown"] * len(question_matrix), np.zeros(len(question_matrix), dtype=np.float32)
+        sim = question_matrix @ category_matrix.T
+        best = sim.argmax(axis=1)
+        scores = sim[np.arange(len(best)), best]
+        labels = [
+            categories[i] if score >= self.threshold else "unknown"
+            for i, score in zip(best, scores)
+        ]
+        return labels, scores
+
+    def assign(self, question_matrix: np.ndarray) -> list[str]:
+        """
+        return the best category of every row, or "unknown" below the threshold.
+
+        :param question_matrix: l2-normalized question embeddings
+        :return list: category per question
+        """
+        return self.assign_with_scores(question_matrix)[0]
+
+    def classify(self, question: str) -> str:
+        """
+        :param question: user question
+        :return str: category of the question or "unknown"
+        """
+        self.ensure_loaded()
+        return self.assign(self.embed([question]))[0]
+
+    def group(self) -> list[str]:
+        """
+        :return list: category of every stored question, read from the count table
+        """
+        self.ensure_loaded()
+        return [self._label(c, s) for c, s in zip(self.best_category, self.best_score)]
+
+    def category_vector(self, category: str) -> np.ndarray:
+        """
+        :param category: category name, embedded only if it is not in the index
+        :return np.ndarray: l2-normalized embedding of the category
+        """
+        self.ensure_loaded()
+        categories, category_matrix = self.category_state
+        if category in categories:
+            return category_matrix[categories.index(category)]
+        return self.embed([category])[0]
+
+    def count_all(self) -> dict:
+        """
+        :return dict: number of stored questions per best category (or "unknown")
+        """
+        self.ensure_loaded()
+        return dict(self.counts)
+
+    def count_category(self, category: str) -> int:
+        """
+        :param category: category name
+        :return int: number of stored questions whose similarity to the category reaches the threshold
+        """
+        self.ensure_loaded()
+        above_counts = self.above_counts
+        if category in above_counts:
+            return above_counts[category]
+        if len(self.questions) == 0:
+            return 0
+        return int(np.count_nonzero(self.question_matrix @ self.category_vector(category) >= self.threshold))
@@ -1,10 +1,36 @@
+import os
+import sys
+import time
+from collections import deque
+
+# turns kept per session, older ones are dropped
+MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "20"))
+
+
 class Chat:
-    def __init__(self,user_id:str):
+    # __slots__ and (question, answer) tuples keep every session small
+    __slots__ = ("user_id", "chat_history", "last_active")
+
+    def __init__(self,user_id:str,max_turns:int=MAX_TURNS):
         self.user_id = user_id
-        self.chat_history = []
+        # ring buffer of the last max_turns (question, answer) pairs
+        self.chat_history = deque(maxlen=max_turns)
+        self.last_active = time.monotonic()
     
     def append_message(self,question:str,answer:str):
-        self.chat_history.append({"question":question,"answer":answer})
+        self.chat_history.append((question, answer))
+        self.touch()
+
+    def touch(self):
+        self.last_active = time.monotonic()
 
     def get_history(self):
-        return self.chat_history
\ No newline at end of file
+        return [{"question": question, "answer": answer} for question, answer in self.chat_history]
+
+    def size(self) -> int:
+        """
+        :return int: approximate bytes held by the session
+        """
+        return sys.getsizeof(self) + sys.getsizeof(self.chat_history) + sum(
+            sys.getsizeof(question) + sys.getsizeof(answer) for question, answer in self.chat_history
+        )
@@ -0,0 +1,151 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# blocking client calls (Milvus gRPC, Ollama HTTP, file I/O) run on this pool
+BLOCKING_POOL_SIZE = int(os.getenv("BLOCKING_POOL_SIZE", "16"))
+# requests handled at the same time, the rest wait in line
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "32"))
+# requests allowed to wait in line before new ones are rejected with 503
+MAX_WAITING_REQUESTS = int(os.getenv("MAX_WAITING_REQUESTS", "256"))
+# seconds a request may take, including its time in line, before it fails with 504
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "10"))
+
+_executor = ThreadPoolExecutor(max_workers=BLOCKING_POOL_SIZE, thread_name_prefix="blocking")
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """
+    run a blocking call on the bounded thread pool instead of the event loop.
+
+    :param fn: blocking callable
+    :return: the return value of fn
+    """
+    loop = asyncio.get_running_loop()
+    # run in a copy of the caller's context so request spans reach the request trace
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, functools.partial(context.run, fn, *args, **kwargs))
+
+
+class RequestLimiter:
+    """
+    bounds the number of requests in flight on the hot path.
+    when too many requests are already waiting new ones are rejected right away
+    (503), and every request gets a deadline (504), so a slow backend cannot
+    pile up unbounded work.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = MAX_CONCURRENT_REQUESTS,
+        max_waiting: int = MAX_WAITING_REQUESTS,
+        timeout: float = REQUEST_TIMEOUT,
+    ):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self._semaphore = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    async def run(self, coro):
+        """
+        run a coroutine under the concurrency limit and the request timeout.
+
+        :param coro: coroutine handling the request
+        :return: the result of the coroutine
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        if self.waiting >= self.max_waiting:
+            coro.close()
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Server is busy, please try again.")
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        if not self._semaphore.locked():
+            # a free slot is taken without suspending
+            await self._semaphore.acquire()
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                coro.close()
+                self.timed_out += 1
+                raise HTTPException(status_code=504, detail="Request timed out.")
+            finally:
+                self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            return await asyncio.wait_for(coro, max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise HTTPException(status_code=504, detail="Request timed out.")
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self):
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_waiting": self.max_waiting,
+            "timeout": self.timeout,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+class FileLock:
+    """
+    lock held by one thread of one process at a time: a thread lock for this
+    process plus an flock on the lock file for every worker on the host.
+    where fcntl is missing only the thread lock is taken.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if fcntl is None:
+            return self
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "a")
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        except BaseException:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._lock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            if self._file is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+                self._file.close()
+                self._file = None
+        finally:
+            self._lock.release()
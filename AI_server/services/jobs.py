@@ -0,0 +1,79 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class RebuildWorker:
+    """
+    runs dataset rebuilds one at a time in a background thread.
+    a rebuild always reads the latest dataset when it starts, so edits which
+    arrive while a job is still queued share that job.
+    """
+
+    def __init__(self, max_jobs: int = 50):
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rebuild")
+        self._lock = threading.Lock()
+
+    def submit(self, task) -> str:
+        """
+        queue a rebuild.
+
+        :param task: callable receiving a progress callback, its return value is stored as the job result
+        :return str: job id
+        """
+        with self._lock:
+            for job in self.jobs.values():
+                if job["status"] == "queued":
+                    return job["id"]
+            job = {
+                "id": uuid.uuid4().hex,
+                "status": "queued",
+                "progress": 0.0,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "duration": None,
+                "result": None,
+                "error": None,
+            }
+            self.jobs[job["id"]] = job
+            while len(self.jobs) > self.max_jobs:
+                self.jobs.popitem(last=False)
+        self._executor.submit(self._run, job, task)
+        return job["id"]
+
+    def _run(self, job, task):
+        job["status"] = "running"
+        job["started_at"] = time.time()
+
+        def progress(value):
+            job["progress"] = round(float(value), 3)
+
+        try:
+            job["result"] = task(progress)
+            job["status"] = "done"
+            job["progress"] = 1.0
+        except Exception as exc:
+            job["status"] = "failed"
+            job["error"] = str(exc)
+        finally:
+            job["finished_at"] = time.time()
+            job["duration"] = job["finished_at"] - job["started_at"]
+
+    def get(self, job_id: str | None = None):
+        """
+        return a job by id, or the latest job when no id is given.
+
+        :param job_id: job id
+        :return dict|None: copy of the job
+        """
+        with self._lock:
+            if job_id is None:
+                job = next(reversed(self.jobs.values()), None)
+            else:
+                job = self.jobs.get(job_id)
+            return dict(job) if job else None
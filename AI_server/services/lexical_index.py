@@ -0,0 +1,60 @@
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+class LexicalIndex:
+    """
+    cheap character n-gram TF-IDF index over the stored questions.
+    it catches typos and small rewordings of stored questions without calling
+    the embedding model.
+    """
+
+    def __init__(self, questions: list[str] | None = None):
+        self.questions = []
+        self.vectorizer = None
+        self.matrix = None
+        if questions:
+            self.build(questions)
+
+    def build(self, questions: list[str]):
+        """
+        fit the index on the (normalized) stored questions.
+
+        :param questions: normalized questions
+        """
+        questions = list(dict.fromkeys(q for q in questions if q))
+        if not questions:
+            self.questions, self.vectorizer, self.matrix = [], None, None
+            return
+        vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4), sublinear_tf=True)
+        matrix = vectorizer.fit_transform(questions)
+        self.questions, self.vectorizer, self.matrix = questions, vectorizer, matrix
+
+    def rows(self, questions) -> np.ndarray:
+        """
+        :param questions: normalized stored questions
+        :return np.ndarray: their row numbers, for search
+        """
+        position = {q: i for i, q in enumerate(self.questions)}
+        return np.array(sorted({position[q] for q in questions if q in position}), dtype=np.int64)
+
+    def search(self, question: str, k: int = 2, rows: np.ndarray | None = None) -> list[tuple[str, float]]:
+        """
+        return the k most similar stored questions.
+
+        :param question: normalized user question
+        :param k: number of results
+        :param rows: only search these rows (see rows), all rows if None
+        :return list: (stored question, cosine similarity) pairs, best first
+        """
+        if self.matrix is None or not question:
+            return []
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        if matrix.shape[0] == 0:
+            return []
+        # rows are l2 normalized by TfidfVectorizer, so the dot product is the cosine
+        scores = (matrix @ self.vectorizer.transform([question]).T).toarray().ravel()
+        top = scores.argsort()[::-1][:k]
+        if rows is not None:
+            return [(self.questions[rows[i]], float(scores[i])) for i in top]
+        return [(self.questions[i], float(scores[i])) for i in top]
@@ -0,0 +1,59 @@
+import json
+import logging
+import os
+import sys
+import time
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" writes one JSON object per line, "text" is easier to read locally
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+
+
+class JsonFormatter(logging.Formatter):
+    """one JSON object per record; fields passed as extra={"fields": {...}} become top-level keys"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        fields = getattr(record, "fields", None) or {}
+        line = f"{time.strftime('%H:%M:%S', time.localtime(record.created))} {record.levelname:<7} {record.name}: {record.getMessage()}"
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def _configure():
+    logger = logging.getLogger("ai_server")
+    if logger.handlers:
+        return logger
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+    return logger
+
+
+_configure()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    :param name: component name, e.g. "chat" or "vector_store"
+    :return logging.Logger: structured logger below the ai_server logger
+    """
+    return logging.getLogger(f"ai_server.{name}")
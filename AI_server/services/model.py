@@ -1,9 +1,213 @@
+import asyncio
+import os
+import threading
+import time
+from langchain_core.embeddings import Embeddings
 from langchain_ollama import OllamaEmbeddings
+from services.cache import EmbeddingCache
+from services.concurrency import run_blocking
+
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "4096"))
+# empty string turns the on-disk tier off
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "./cache/embeddings.sqlite3")
+# rows kept on disk (every model together), the oldest are evicted first
+EMBED_CACHE_DISK_ENTRIES = int(os.getenv("EMBED_CACHE_DISK_ENTRIES", "100000"))
+# concurrent queries arriving within the window are embedded in one call
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+# embedding models of the chat and category routers, EMBED_MODEL sets both so
+# Ollama keeps a single model resident and every question is embedded once
+EMBED_MODEL = os.getenv("EMBED_MODEL", "")
+CHAT_EMBED_MODEL = EMBED_MODEL or os.getenv("CHAT_EMBED_MODEL", "nomic-embed-text")
+CATEGORY_EMBED_MODEL = EMBED_MODEL or os.getenv("CATEGORY_EMBED_MODEL", "mxbai-embed-large")
+
+
+class LazyEmbeddings(Embeddings):
+    """
+    creates the underlying embedding client on first use, so importing a router
+    never opens a connection. the client is then reused by every call.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> Embeddings:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self.factory()
+        return self._client
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.client.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.client.embed_query(text)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    embedding wrapper which serves repeated texts from an EmbeddingCache and only
+    sends the missing ones to the underlying model, in a single call.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors = [self.cache.get(text) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # embed each distinct missing text only once
+            missing_texts = list(dict.fromkeys(texts[i] for i in missing))
+            new_vectors = self.embeddings.embed_documents(missing_texts)
+            self.cache.put_many(missing_texts, new_vectors)
+            by_text = dict(zip(missing_texts, new_vectors))
+            for i in missing:
+                vectors[i] = list(by_text[texts[i]])
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+class EmbeddingScheduler:
+    """
+    micro-batching scheduler for concurrent queries.
+
+    requests arriving within window_ms of the first waiting one (or until
+    max_batch are waiting) are embedded with a single embed_documents call,
+    which runs on the bounded blocking pool so the event loop is never blocked.
+    any object with embed_documents(texts) can be scheduled.
+    """
+
+    def __init__(self, embeddings, window_ms: float = EMBED_BATCH_WINDOW_MS, max_batch: int = EMBED_MAX_BATCH):
+        self.embeddings = embeddings
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self._queue = None
+        self._loop = None
+        self._worker = None
+        self.batches = 0
+        self.items = 0
+        self.max_fill = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def embed(self, text: str) -> list[float]:
+        """
+        embed a single text together with the other texts waiting in the window.
+
+        :param text: normalized text
+        :return list: embedding vector
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((text, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            now = time.perf_counter()
+            for _, _, queued_at in batch:
+                wait = now - queued_at
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            self.batches += 1
+            self.items += len(batch)
+            self.max_fill = max(self.max_fill, len(batch))
+
+            texts = list(dict.fromkeys(text for text, _, _ in batch))
+            try:
+                vectors = await run_blocking(self.embeddings.embed_documents, texts)
+            except Exception as exc:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            by_text = dict(zip(texts, vectors))
+            for text, future, _ in batch:
+                # the caller may have given up (timeout or disconnect)
+                if not future.done():
+                    future.set_result(by_text[text])
+
+    def stats(self):
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_fill": self.items / self.batches if self.batches else 0.0,
+            "max_fill": self.max_fill,
+            "mean_wait_ms": self.total_wait * 1000 / self.items if self.items else 0.0,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
 
 class Model:
     def __init__(self,model_name: str):
         self.model_name = model_name
+        self.embedding_cache = EmbeddingCache(
+            model_name, max_entries=EMBED_CACHE_SIZE, disk_path=EMBED_CACHE_PATH,
+            max_disk_entries=EMBED_CACHE_DISK_ENTRIES,
+        )
+        self.client = LazyEmbeddings(lambda: OllamaEmbeddings(model=self.model_name))
         self.embedding_model = self.load_embedding_model()
-    
+        # concurrent queries of every router using this model share one batch
+        self.scheduler = EmbeddingScheduler(self.embedding_model)
+
     def load_embedding_model(self):
-        return OllamaEmbeddings(model=self.model_name)
\ No newline at end of file
+        return CachedEmbeddings(self.client, self.embedding_cache)
+
+    def warm_up(self, probe: str):
+        """
+        embed the probe with the model itself, bypassing the cache, so Ollama
+        has the model loaded before the first question. also used as health check.
+
+        :param probe: text to embed
+        """
+        if not self.client.embed_query(probe):
+            raise RuntimeError(f"{self.model_name} returned an empty embedding")
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_model(model_name: str) -> Model:
+    """
+    registry of embedding models: every router asking for the same model name
+    shares one client, cache and scheduler.
+
+    :param model_name: Ollama embedding model
+    :return Model: the shared model
+    """
+    with _models_lock:
+        if model_name not in _models:
+            _models[model_name] = Model(model_name)
+        return _models[model_name]
@@ -0,0 +1,185 @@
+import copy
+import gzip
+import hashlib
+import json
+import os
+import threading
+import orjson
+from services.concurrency import FileLock
+from services.metrics import span
+from services.utils import write_atomic
+
+QA_LIST_PATH = "./background_docs/QA_list.json"
+
+
+class QARepository:
+    """
+    in-memory copy of QA_list.json with an id -> item and a category -> items index.
+
+    reads never touch the disk unless the file changed (checked by mtime and
+    size first, then by content hash), so an edit made by another worker is
+    picked up by the next read. writes hold a lock file, so workers editing at
+    the same time do not overwrite each other's changes, and are saved
+    atomically by writing a temporary file and renaming it over the dataset.
+    the whole dataset is also kept as a ready-made JSON body (plain and gzip)
+    with its ETag, so serving the full list does not serialize anything.
+    """
+
+    def __init__(self, path: str = QA_LIST_PATH):
+        self.path = path
+        self.items = []
+        self.by_id = {}
+        self.by_category = {}
+        self.content_hash = None
+        self.serialized = None
+        self.version = 0
+        self._signature = None
+        self._lock = threading.RLock()
+        self._write_lock = FileLock(f"{path}.lock")
+
+    def _file_signature(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _index(self, items, content_hash, signature):
+        by_id = {item["id"]: item for item in items}
+        by_category = {}
+        for item in items:
+            by_category.setdefault(item["category"], []).append(item)
+        body = orjson.dumps(items)
+        self.items, self.by_id, self.by_category = items, by_id, by_category
+        self.serialized = (body, gzip.compress(body, compresslevel=6), f'"{content_hash[:32]}"')
+        self.content_hash, self._signature = content_hash, signature
+        self.version += 1
+
+    def refresh(self) -> bool:
+        """
+        reload the dataset if the file changed on disk.
+
+        :return bool: True if the dataset was reloaded
+        """
+        with self._lock:
+            signature = self._file_signature()
+            if signature == self._signature:
+                return False
+            with span("json_read"), open(self.path, "rb") as f:
+                raw = f.read()
+            content_hash = hashlib.sha256(raw).hexdigest()
+            if content_hash == self.content_hash:
+                self._signature = signature
+                return False
+            with span("json_parse"):
+                items = json.loads(raw.decode("utf-8"))
+            self._index(items, content_hash, signature)
+            return True
+
+    def _save(self, items):
+        with span("json_write"):
+            raw = json.dumps(items, ensure_ascii=False, indent=4).encode("utf-8")
+            write_atomic(self.path, lambda f: f.write(raw), fsync=True)
+        self._index(items, hashlib.sha256(raw).hexdigest(), self._file_signature())
+
+    def changed(self) -> bool:
+        """
+        :return bool: True if the file on disk may differ from the loaded dataset (one stat, nothing is read)
+        """
+        try:
+            return self._file_signature() != self._signature
+        except OSError:
+            return True
+
+    def dataset_hash(self) -> str:
+        """
+        :return str: sha256 of QA_list.json as it is on disk now
+        """
+        self.refresh()
+        return self.content_hash
+
+    def all(self) -> list:
+        """
+        :return list: every qa item
+        """
+        self.refresh()
+        return self.items
+
+    def all_serialized(self) -> tuple[bytes, bytes, str]:
+        """
+        :return tuple: JSON body, gzip compressed JSON body and ETag of the whole dataset
+        """
+        self.refresh()
+        return self.serialized
+
+    def get(self, qa_id) -> dict | None:
+        """
+        :param qa_id: id of the qa item
+        :return dict|None: the qa item
+        """
+        self.refresh()
+        return self.by_id.get(qa_id)
+
+    def get_by_category(self, category: str) -> list:
+        """
+        :param category: category name
+        :return list: qa items of the category
+        """
+        self.refresh()
+        return self.by_category.get(category, [])
+
+    def next_id(self) -> int:
+        """
+        :return int: id of the next qa item to add
+        """
+        self.refresh()
+        return len(self.items) + 1
+
+    def update(self, new_qa: dict) -> bool:
+        """
+        replace category, questions, answer and common of an existing qa item.
+
+        :param new_qa: qa item with the id to update
+        :return bool: False if the id is not in the dataset
+        """
+        with self._write_lock, self._lock:
+            self.refresh()
+            if new_qa["id"] not in self.by_id:
+                return False
+            items = copy.deepcopy(self.items)
+            for qa in items:
+                if qa["id"] == new_qa["id"]:
+                    qa["category"] = new_qa["category"]
+                    qa["questions"] = new_qa["questions"]
+                    qa["answer"] = new_qa["answer"]
+                    qa["common"] = new_qa["common"]
+            self._save(items)
+            return True
+
+    def add(self, new_qa: dict) -> bool:
+        """
+        append a new qa item, its id must be the next id.
+
+        :param new_qa: new qa item
+        :return bool: False if the id is not the next id
+        """
+        with self._write_lock, self._lock:
+            if new_qa["id"] != self.next_id():
+                return False
+            self._save(copy.deepcopy(self.items) + [new_qa])
+            return True
+
+    def delete(self, qa_id) -> bool:
+        """
+        delete a qa item and renumber the remaining ones from 1, the dashboard
+        numbers a new item after the length of the list.
+
+        :param qa_id: id of the qa item
+        :return bool: False if the id is not in the dataset
+        """
+        with self._write_lock, self._lock:
+            self.refresh()
+            if qa_id not in self.by_id:
+                return False
+            items = [copy.deepcopy(item) for item in self.items if item["id"] != qa_id]
+            for new_id, item in enumerate(items, start=1):
+                item["id"] = new_id
+            self._save(items)
+            return True
@@ -0,0 +1,124 @@
+import json
+import os
+import pickle
+import threading
+import numpy as np
+from services.log import get_logger
+
+logger = get_logger("classifier")
+
+# TF-IDF + LogisticRegression artifacts written by careerhub-ml/ml_training.py
+CLASSIFIER_DIR = os.getenv("CLASSIFIER_DIR", "../careerhub-ml")
+CLASSIFIER_ENABLED = os.getenv("CLASSIFIER_ENABLED", "1") == "1"
+# optional JSON file replacing CATEGORY_MAP
+CLASSIFIER_CATEGORY_MAP = os.getenv("CLASSIFIER_CATEGORY_MAP", "")
+
+# the classifier is trained on the careerhub-ml labels, which are not the
+# categories of QA_list.json, so every label points at the QA categories it covers
+CATEGORY_MAP = {
+    "Appointments": ["Career Guidance & Appointment"],
+    "CV / Resume Help": ["CV & Cover Letter"],
+    "Cover Letter Help": ["CV & Cover Letter"],
+    "Internships / Placements": ["Intersnships & Volunteering"],
+    "EPA / Workplace Skills": ["Intersnships & Volunteering", "Workshops & Events"],
+    "Job Search & Applications": ["Job Search"],
+    "Career Guidance / Other": ["General", "Career Guidance & Appointment"],
+}
+
+
+class QuestionClassifier:
+    """
+    the careerhub-ml category classifier, loaded once and served in process.
+
+    only the vectorizer is used from scikit-learn at query time; the logistic
+    regression is applied as one sparse product and a softmax, which avoids
+    the per-call overhead of predict_proba.
+    if the artifacts are missing or cannot be loaded the classifier stays
+    disabled and predict returns None.
+    """
+
+    def __init__(self, model_dir: str = CLASSIFIER_DIR, category_map: dict | None = None,
+                 enabled: bool = CLASSIFIER_ENABLED):
+        self.model_dir = model_dir
+        self.category_map = category_map
+        self.enabled = enabled
+        self.vectorizer = None
+        self.labels = []
+        self.coef = None
+        self.intercept = None
+        self.error = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """read the pickles and the label mapping, only the first call does any work"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if self.enabled:
+                try:
+                    self._load()
+                except Exception as exc:
+                    # unpickling artifacts of another scikit-learn version can raise almost anything
+                    self.error = f"{type(exc).__name__}: {exc}"
+                    self.vectorizer = None
+                    logger.warning("question classifier disabled", exc_info=True, extra={"fields": {"error": self.error}})
+            self._loaded = True
+
+    def _load(self):
+        with open(os.path.join(self.model_dir, "question_vectorizer.pkl"), "rb") as f:
+            vectorizer = pickle.load(f)
+        with open(os.path.join(self.model_dir, "question_classifier.pkl"), "rb") as f:
+            classifier = pickle.load(f)
+        if self.category_map is None:
+            if CLASSIFIER_CATEGORY_MAP:
+                with open(CLASSIFIER_CATEGORY_MAP, "r", encoding="utf-8") as f:
+                    self.category_map = json.load(f)
+            else:
+                self.category_map = CATEGORY_MAP
+        self.labels = [str(label) for label in classifier.classes_]
+        coef = np.asarray(classifier.coef_, dtype=np.float64)
+        intercept = np.asarray(classifier.intercept_, dtype=np.float64)
+        if coef.shape[0] == 1:
+            # binary models store one row for the positive class; a zero row for the
+            # negative class makes the softmax equal predict_proba's sigmoid(z)
+            coef = np.vstack([np.zeros_like(coef), coef])
+            intercept = np.concatenate([np.zeros_like(intercept), intercept])
+        self.coef, self.intercept = coef.T.copy(), intercept
+        self.vectorizer = vectorizer
+
+    @property
+    def available(self) -> bool:
+        self.load()
+        return self.vectorizer is not None
+
+    def predict(self, question: str) -> tuple[str, float] | None:
+        """
+        :param question: normalized user question
+        :return tuple|None: predicted label and its probability, None if the classifier is disabled
+        """
+        if not self.available or not question:
+            return None
+        scores = np.asarray(self.vectorizer.transform([question]) @ self.coef).ravel() + self.intercept
+        scores = np.exp(scores - scores.max())
+        best = int(scores.argmax())
+        return self.labels[best], float(scores[best] / scores.sum())
+
+    def qa_categories(self, label: str) -> list[str]:
+        """
+        :param label: classifier label
+        :return list: QA categories the label covers
+        """
+        self.load()
+        return list((self.category_map or {}).get(label, []))
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "available": self.available,
+            "model_dir": self.model_dir,
+            "labels": self.labels,
+            "error": self.error,
+        }
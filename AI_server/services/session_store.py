@@ -0,0 +1,430 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from services.chat import Chat, MAX_TURNS
+from services.log import get_logger
+
+logger = get_logger("sessions")
+
+# "memory" keeps sessions in this process, "sqlite" shares them between workers
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+# sessions idle for longer than this many seconds are dropped
+SESSION_TTL = float(os.getenv("SESSION_TTL", "1800"))
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "10000"))
+MAX_SESSION_BYTES = int(os.getenv("MAX_SESSION_BYTES", str(64 * 1024 * 1024)))
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "./cache/sessions.sqlite3")
+# turns are written to sqlite in one transaction every SESSION_FLUSH_MS or every SESSION_FLUSH_SIZE turns
+SESSION_FLUSH_MS = float(os.getenv("SESSION_FLUSH_MS", "50"))
+SESSION_FLUSH_SIZE = int(os.getenv("SESSION_FLUSH_SIZE", "64"))
+# without new turns, idle sessions are expired only every SESSION_SWEEP_S seconds
+SESSION_SWEEP_S = float(os.getenv("SESSION_SWEEP_S", "30"))
+
+
+class SessionBackend:
+    """
+    interface of a chat session backend.
+
+    every backend keeps at most max_turns turns per session, drops sessions
+    idle for longer than ttl and evicts the least recently used sessions once
+    max_sessions or max_bytes is exceeded.
+    """
+
+    def get(self, user_id: str) -> Chat | None:
+        """the live session of the user"""
+        raise NotImplementedError
+
+    def append(self, user_id: str, question: str, answer: str):
+        """record a turn, creating the session if needed"""
+        raise NotImplementedError
+
+    def pop(self, user_id: str) -> Chat | None:
+        """remove the session of the user and return it"""
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemorySessionBackend(SessionBackend):
+    """
+    sessions kept in this process in least recently used order, so idle
+    sessions are expired from the front, and when the entry or memory cap is
+    reached the least recently used sessions are evicted first.
+    """
+
+    def __init__(
+        self,
+        ttl: float = SESSION_TTL,
+        max_sessions: int = MAX_SESSIONS,
+        max_bytes: int = MAX_SESSION_BYTES,
+        max_turns: int = MAX_TURNS,
+    ):
+        self.ttl = ttl
+        self.max_sessions = max(1, max_sessions)
+        self.max_bytes = max_bytes
+        self.max_turns = max_turns
+        self._sessions = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.bytes_held = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expire(self):
+        deadline = time.monotonic() - self.ttl
+        while self._sessions:
+            user_id, chat = next(iter(self._sessions.items()))
+            if chat.last_active >= deadline:
+                break
+            self._drop(user_id)
+            self.expirations += 1
+
+    def _evict(self):
+        while self._sessions and (len(self._sessions) > self.max_sessions or self.bytes_held > self.max_bytes):
+            self._drop(next(iter(self._sessions)))
+            self.evictions += 1
+
+    def _drop(self, user_id):
+        chat = self._sessions.pop(user_id)
+        self.bytes_held -= self._sizes.pop(user_id)
+        return chat
+
+    def get(self, user_id: str) -> Chat | None:
+        with self._lock:
+            self._expire()
+            chat = self._sessions.get(user_id)
+            if chat is not None:
+                # a read counts as activity, like in sqlite, and _expire relies on
+                # the order of the dict following last_active
+                chat.touch()
+                self._sessions.move_to_end(user_id)
+            return chat
+
+    def append(self, user_id: str, question: str, answer: str):
+        with self._lock:
+            self._expire()
+            chat = self._sessions.get(user_id)
+            if chat is None:
+                chat = Chat(user_id, max_turns=self.max_turns)
+                self._sessions[user_id] = chat
+                self._sizes[user_id] = 0
+            chat.append_message(question, answer)
+            self._sessions.move_to_end(user_id)
+            size = chat.size()
+            self.bytes_held += size - self._sizes[user_id]
+            self._sizes[user_id] = size
+            self._evict()
+
+    def pop(self, user_id: str) -> Chat | None:
+        with self._lock:
+            self._expire()
+            if user_id not in self._sessions:
+                return None
+            return self._drop(user_id)
+
+    def stats(self):
+        with self._lock:
+            self._expire()
+            return {
+                "backend": "memory",
+                "live_sessions": len(self._sessions),
+                "bytes_held": self.bytes_held,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SqliteSessionBackend(SessionBackend):
+    """
+    sessions kept in a sqlite database in WAL mode, so every uvicorn worker (or
+    every node sharing the file) reads the same history.
+
+    appended turns are buffered and written by a background thread in a single
+    transaction every flush_ms or every flush_size turns. reads in this process
+    flush the buffer first, so a worker always sees its own writes, and other
+    workers see them at most flush_ms later. last_active is wall clock time
+    because it is compared between processes.
+
+    every method may wait on the database, call them through run_blocking from
+    request handlers.
+    """
+
+    def __init__(
+        self,
+        path: str = SESSION_DB_PATH,
+        ttl: float = SESSION_TTL,
+        max_sessions: int = MAX_SESSIONS,
+        max_bytes: int = MAX_SESSION_BYTES,
+        max_turns: int = MAX_TURNS,
+        flush_ms: float = SESSION_FLUSH_MS,
+        flush_size: int = SESSION_FLUSH_SIZE,
+        sweep_s: float = SESSION_SWEEP_S,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_sessions = max(1, max_sessions)
+        self.max_bytes = max_bytes
+        self.max_turns = max_turns
+        self.flush_interval = flush_ms / 1000
+        self.flush_size = max(1, flush_size)
+        self.sweep_interval = sweep_s
+        self._last_sweep = 0.0
+        self.evictions = 0
+        self.expirations = 0
+        self.flushes = 0
+        self.flushed_turns = 0
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._db = self._open()
+        self._flusher = threading.Thread(target=self._run, name="session-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                user_id TEXT PRIMARY KEY, last_active REAL NOT NULL, bytes INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS sessions_last_active ON sessions (last_active);
+            CREATE TABLE IF NOT EXISTS turns (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, question TEXT, answer TEXT
+            );
+            CREATE INDEX IF NOT EXISTS turns_user ON turns (user_id, seq);
+            """
+        )
+        db.commit()
+        return db
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as exc:
+                logger.error("session flush failed", extra={"fields": {"error": str(exc)}})
+
+    def flush(self):
+        """
+        write the buffered turns in one transaction and apply ttl, ring buffer and caps.
+        with nothing buffered the ttl and caps are only applied every sweep_interval
+        seconds, so an idle flusher does not query the whole table every flush_ms.
+        """
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        now = time.monotonic()
+        if not pending and now - self._last_sweep < self.sweep_interval:
+            return
+        with self._db_lock:
+            self._last_sweep = now
+            with self._db:
+                if pending:
+                    self._write(pending)
+                self._expire()
+                self._evict()
+        if pending:
+            self.flushes += 1
+            self.flushed_turns += len(pending)
+
+    def _write(self, pending):
+        self._db.executemany(
+            "INSERT INTO turns (user_id, question, answer) VALUES (?, ?, ?)",
+            [(user_id, question, answer) for user_id, question, answer, _ in pending],
+        )
+        last_active = {}
+        for user_id, _, _, at in pending:
+            last_active[user_id] = max(at, last_active.get(user_id, at))
+        for user_id, at in last_active.items():
+            # keep only the last max_turns turns of the session
+            self._db.execute(
+                """
+                DELETE FROM turns WHERE user_id = ? AND seq NOT IN (
+                    SELECT seq FROM turns WHERE user_id = ? ORDER BY seq DESC LIMIT ?
+                )
+                """,
+                (user_id, user_id, self.max_turns),
+            )
+            (size,) = self._db.execute(
+                "SELECT COALESCE(SUM(LENGTH(question) + LENGTH(answer)), 0) FROM turns WHERE user_id = ?",
+                (user_id,),
+            ).fetchone()
+            self._db.execute(
+                """
+                INSERT INTO sessions (user_id, last_active, bytes) VALUES (?, ?, ?)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    last_active = MAX(last_active, excluded.last_active), bytes = excluded.bytes
+                """,
+                (user_id, at, size),
+            )
+
+    def _delete(self, user_ids):
+        rows = [(user_id,) for user_id in user_ids]
+        self._db.executemany("DELETE FROM turns WHERE user_id = ?", rows)
+        self._db.executemany("DELETE FROM sessions WHERE user_id = ?", rows)
+
+    def _expire(self):
+        expired = [
+            user_id
+            for (user_id,) in self._db.execute(
+                "SELECT user_id FROM sessions WHERE last_active < ?", (time.time() - self.ttl,)
+            )
+        ]
+        if expired:
+            self._delete(expired)
+            self.expirations += len(expired)
+
+    def _evict(self):
+        count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM sessions").fetchone()
+        if count <= self.max_sessions and total <= self.max_bytes:
+            return
+        evicted = []
+        for user_id, size in self._db.execute("SELECT user_id, bytes FROM sessions ORDER BY last_active"):
+            if count <= self.max_sessions and total <= self.max_bytes:
+                break
+            evicted.append(user_id)
+            count -= 1
+            total -= size
+        self._delete(evicted)
+        self.evictions += len(evicted)
+
+    def append(self, user_id: str, question: str, answer: str):
+        with self._pending_lock:
+            self._pending.append((user_id, question, answer, time.time()))
+            full = len(self._pending) >= self.flush_size
+        if full:
+            self._wakeup.set()
+
+    def _load(self, user_id: str) -> Chat | None:
+        row = self._db.execute(
+            "SELECT last_active FROM sessions WHERE user_id = ? AND last_active >= ?",
+            (user_id, time.time() - self.ttl),
+        ).fetchone()
+        if row is None:
+            return None
+        chat = Chat(user_id, max_turns=self.max_turns)
+        for question, answer in self._db.execute(
+            "SELECT question, answer FROM turns WHERE user_id = ? ORDER BY seq", (user_id,)
+        ):
+            chat.chat_history.append((question, answer))
+        return chat
+
+    def get(self, user_id: str) -> Chat | None:
+        self.flush()
+        with self._db_lock:
+            chat = self._load(user_id)
+            if chat is not None:
+                with self._db:
+                    self._db.execute(
+                        "UPDATE sessions SET last_active = MAX(last_active, ?) WHERE user_id = ?",
+                        (time.time(), user_id),
+                    )
+            return chat
+
+    def pop(self, user_id: str) -> Chat | None:
+        self.flush()
+        with self._db_lock:
+            with self._db:
+                chat = self._load(user_id)
+                self._delete([user_id])
+            return chat
+
+    def stats(self):
+        self.flush()
+        with self._db_lock:
+            count, total = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM sessions"
+            ).fetchone()
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "live_sessions": count,
+            "bytes_held": total,
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "pending_turns": pending,
+            "flushes": self.flushes,
+            "mean_flush_size": self.flushed_turns / self.flushes if self.flushes else 0.0,
+        }
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join(timeout=1)
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+
+
+SESSION_BACKENDS = {
+    "memory": MemorySessionBackend,
+    "sqlite": SqliteSessionBackend,
+}
+
+
+class SessionStore:
+    """chat sessions, kept by the backend selected with SESSION_BACKEND"""
+
+    def __init__(self, backend=None):
+        backend = backend or SESSION_BACKEND
+        if backend not in SESSION_BACKENDS:
+            raise ValueError(f"Unknown session backend: {backend}")
+        self.backend = SESSION_BACKENDS[backend]()
+
+    def get(self, user_id: str) -> Chat | None:
+        """
+        :param user_id: user's unique identifier
+        :return Chat|None: the live session of the user
+        """
+        return self.backend.get(user_id)
+
+    def append(self, user_id: str, question: str, answer: str):
+        """
+        record a turn, creating the session if needed.
+
+        :param user_id: user's unique identifier
+        :param question: user question
+        :param answer: answer returned to the user
+        """
+        self.backend.append(user_id, question, answer)
+
+    def pop(self, user_id: str) -> Chat | None:
+        """
+        :param user_id: user's unique identifier
+        :return Chat|None: the removed session
+        """
+        return self.backend.pop(user_id)
+
+    def __contains__(self, user_id):
+        return self.get(user_id) is not None
+
+    def stats(self):
+        return self.backend.stats()
+
+    def close(self):
+        self.backend.close()
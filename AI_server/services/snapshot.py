@@ -0,0 +1,107 @@
+import json
+import os
+import uuid
+import numpy as np
+from services.log import get_logger
+from services.utils import write_atomic
+
+logger = get_logger("snapshot")
+
+# warm-start snapshot of the retrieval state, empty to disable
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "./cache/snapshot")
+SNAPSHOT_FORMAT = 1
+
+
+class RetrievalSnapshot:
+    """
+    the normalized question map and the embedding of every question, saved
+    after each rebuild together with the embedding model, the sha256 of
+    QA_list.json and the vector store version they were built into.
+
+    a worker starting on an unchanged dataset with the same model restores the
+    question map from it and memory-maps the embeddings instead of embedding
+    every paraphrase again. the data files carry a random token and the
+    manifest naming them is replaced last, so a reader never sees a half
+    written snapshot.
+    """
+
+    def __init__(self, name: str, snapshot_dir: str = SNAPSHOT_DIR):
+        self.name = name
+        self.snapshot_dir = snapshot_dir
+        self.manifest_path = os.path.join(snapshot_dir, f"{name}_snapshot.json") if snapshot_dir else None
+
+    @property
+    def enabled(self) -> bool:
+        return self.manifest_path is not None
+
+    def _paths(self, token: str):
+        base = os.path.join(self.snapshot_dir, f"{self.name}_{token}")
+        return f"{base}_questions.json", f"{base}_embeddings.npy"
+
+    def manifest(self) -> dict | None:
+        """
+        :return dict|None: model, dataset_hash, index_version and size of the saved snapshot
+        """
+        if not self.enabled or not os.path.exists(self.manifest_path):
+            return None
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return manifest if manifest.get("format") == SNAPSHOT_FORMAT else None
+
+    def load(self) -> dict | None:
+        """
+        :return dict|None: the manifest plus question_map and embeddings (memory-mapped,
+            one row per question of the map in order), None if there is no usable snapshot
+        """
+        manifest = self.manifest()
+        if manifest is None:
+            return None
+        questions_path, embeddings_path = self._paths(manifest["token"])
+        try:
+            with open(questions_path, "r", encoding="utf-8") as f:
+                question_map = json.load(f)
+            embeddings = np.load(embeddings_path, mmap_mode="r")
+        except (OSError, ValueError) as exc:
+            logger.warning("snapshot unreadable", extra={"fields": {"name": self.name, "error": str(exc)}})
+            return None
+        if len(embeddings) != len(question_map):
+            return None
+        return {**manifest, "question_map": question_map, "embeddings": embeddings}
+
+    def save(self, question_map: dict, embeddings: list, model_name: str, dataset_hash: str, index_version: int | None):
+        """
+        :param question_map: normalized question -> qa entry
+        :param embeddings: embedding of every question of the map, in order
+        :param model_name: embedding model which produced the embeddings
+        :param dataset_hash: sha256 of the dataset the map was built from
+        :param index_version: vector store version holding the embeddings
+        """
+        if not self.enabled:
+            return
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        previous = self.manifest()
+        token = uuid.uuid4().hex[:12]
+        questions_path, embeddings_path = self._paths(token)
+        matrix = np.asarray(embeddings, dtype=np.float32) if len(embeddings) else np.zeros((0, 0), dtype=np.float32)
+        write_atomic(questions_path, lambda f: f.write(json.dumps(question_map, ensure_ascii=False).encode("utf-8")))
+        write_atomic(embeddings_path, lambda f: np.save(f, matrix))
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "token": token,
+            "model": model_name,
+            "dataset_hash": dataset_hash,
+            "index_version": index_version,
+            "questions": len(question_map),
+            "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        }
+        write_atomic(self.manifest_path, lambda f: f.write(json.dumps(manifest).encode("utf-8")))
+        # workers which already mapped the previous files keep their open handles
+        if previous is not None and previous["token"] != token:
+            for path in self._paths(previous["token"]):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
@@ -0,0 +1,131 @@
+import asyncio
+import os
+import time
+from services.concurrency import run_blocking
+from services.log import get_logger
+from services.metrics import registry
+
+logger = get_logger("startup")
+
+# attempts and backoff (seconds, doubled after every failure) when connecting at startup
+STARTUP_RETRIES = int(os.getenv("STARTUP_RETRIES", "5"))
+STARTUP_BACKOFF = float(os.getenv("STARTUP_BACKOFF", "0.5"))
+STARTUP_MAX_BACKOFF = float(os.getenv("STARTUP_MAX_BACKOFF", "8"))
+# text embedded once at startup so the embedding model is loaded before the first question
+WARMUP_PROBE = os.getenv("WARMUP_PROBE", "how do i book a careerhub appointment")
+
+
+def retry(fn, what: str, attempts: int = STARTUP_RETRIES, backoff: float = STARTUP_BACKOFF,
+          max_backoff: float = STARTUP_MAX_BACKOFF):
+    """
+    call fn until it succeeds, sleeping with exponential backoff between attempts.
+
+    :param fn: blocking callable
+    :param what: name used in the log lines
+    :return: the return value of fn, the last exception is raised when every attempt failed
+    """
+    delay = backoff
+    for attempt in range(1, max(1, attempts) + 1):
+        try:
+            return fn()
+        except Exception as exc:
+            if attempt >= attempts:
+                raise
+            logger.warning(
+                "startup step failed, retrying",
+                extra={"fields": {"step": what, "attempt": attempt, "attempts": attempts, "error": str(exc), "retry_in_s": delay}},
+            )
+            time.sleep(delay)
+            delay = min(delay * 2, max_backoff)
+
+
+class Readiness:
+    """
+    warm-up and health checks of the clients the routers depend on.
+
+    routers register their components at import time without touching the
+    network; the FastAPI lifespan then starts warming every component (connect
+    with retry, pre-embed a probe, load the collection) in the background, so
+    the worker already answers /health and /ready (503) meanwhile and reports
+    ready once every component is warm. components which still fail keep being
+    retried in the background.
+    """
+
+    def __init__(self):
+        self.components = {}
+        self.status = {}
+        self._task = None
+
+    def register(self, name: str, warm_up, check=None):
+        """
+        :param name: component name shown by /health
+        :param warm_up: blocking callable run once at startup
+        :param check: blocking callable raising when the component is unhealthy, defaults to warm_up
+        """
+        self.components[name] = (warm_up, check or warm_up)
+        self.status[name] = {"ready": False, "error": None, "warm_up_ms": None}
+
+    @property
+    def ready(self) -> bool:
+        return all(status["ready"] for status in self.status.values())
+
+    async def _warm(self, name: str, attempts: int) -> bool:
+        warm_up, _ = self.components[name]
+        start = time.perf_counter()
+        try:
+            await run_blocking(retry, warm_up, name, attempts)
+        except Exception as exc:
+            self.status[name] = {"ready": False, "error": str(exc), "warm_up_ms": None}
+            return False
+        self.status[name] = {"ready": True, "error": None, "warm_up_ms": (time.perf_counter() - start) * 1000}
+        return True
+
+    async def start(self):
+        """start warming every component in the background, the ones which fail are retried"""
+        self._task = asyncio.get_running_loop().create_task(self._warm_all())
+
+    async def warm_up(self, attempts: int = STARTUP_RETRIES) -> bool:
+        """
+        warm every component once, each with up to attempts tries.
+
+        :return bool: True if every component is ready
+        """
+        for name in self.components:
+            await self._warm(name, attempts)
+        return self.ready
+
+    async def _warm_all(self):
+        await self.warm_up()
+        while not self.ready:
+            await asyncio.sleep(STARTUP_MAX_BACKOFF)
+            for name, status in self.status.items():
+                if not status["ready"]:
+                    await self._warm(name, 1)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def check(self) -> dict:
+        """
+        run the health check of every component.
+
+        :return dict: ok flag and error per component
+        """
+        results = {}
+        for name, (_, check) in self.components.items():
+            try:
+                await run_blocking(check)
+                results[name] = {"ok": True, "error": None}
+            except Exception as exc:
+                results[name] = {"ok": False, "error": str(exc)}
+        return results
+
+
+readiness = Readiness()
+
+registry.gauge(
+    "ai_server_component_ready", "1 once a component is warmed up", ("component",),
+    fn=lambda: {(name,): int(status["ready"]) for name, status in readiness.status.items()},
+)
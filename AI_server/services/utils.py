@@ -0,0 +1,33 @@
+import os
+import numpy as np
+
+
+def write_atomic(path: str, write, fsync: bool = False):
+    """
+    write to a temporary file next to path and rename it over path, so a crash
+    never leaves a half written file and readers see the old or the new content.
+
+    :param path: file to replace
+    :param write: callable receiving the temporary file opened in binary mode
+    :param fsync: flush the data to disk before the rename
+    """
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """
+    :param vectors: embeddings, one per row (or a single embedding)
+    :return np.ndarray: contiguous float32 matrix with l2-normalized rows
+    """
+    matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
@@ -1,33 +1,706 @@
-from pymilvus import connections,utility
-from langchain_milvus import Milvus
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+from langchain_core.documents import Document
+from services.concurrency import FileLock
+from services.log import get_logger
+from services.metrics import span
+from services.utils import normalize_rows, write_atomic
+
+logger = get_logger("vector_store")
+
+# "milvus" keeps the index in the Milvus container, "numpy" keeps it in process
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "milvus")
+MILVUS_URI = os.getenv("MILVUS_URI", "http://localhost:19530")
+# seconds one connection attempt may take
+MILVUS_CONNECT_TIMEOUT = float(os.getenv("MILVUS_CONNECT_TIMEOUT", "5"))
+# ANN index of the Milvus collection; M and efConstruction shape the HNSW graph,
+# ef is the search breadth (raised to k when smaller)
+MILVUS_INDEX_TYPE = os.getenv("MILVUS_INDEX_TYPE", "HNSW")
+MILVUS_HNSW_M = int(os.getenv("MILVUS_HNSW_M", "16"))
+MILVUS_HNSW_EF_CONSTRUCTION = int(os.getenv("MILVUS_HNSW_EF_CONSTRUCTION", "200"))
+MILVUS_HNSW_EF = int(os.getenv("MILVUS_HNSW_EF", "64"))
+# rows fetched per page when reading every id of a collection
+MILVUS_QUERY_BATCH = int(os.getenv("MILVUS_QUERY_BATCH", "4096"))
+# partitions the category partition key is hashed into
+MILVUS_NUM_PARTITIONS = int(os.getenv("MILVUS_NUM_PARTITIONS", "16"))
+# the numpy index is persisted next to QA_list.json
+NUMPY_INDEX_DIR = os.getenv("NUMPY_INDEX_DIR", "./background_docs")
+# lock file which lets only one worker on the host build or delete the index at a time
+BUILD_LOCK_DIR = os.getenv("BUILD_LOCK_DIR", "./cache")
+
+
+def doc_id(text: str) -> str:
+    """
+    stable id of an indexed text. ids are content addressed, so the same
+    paraphrase keeps its id across dataset edits and restarts.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def doc_metadata(metadata: dict | None) -> dict:
+    """
+    metadata stored with every indexed text: the id of its qa item and its
+    category, -1 and "" when unknown
+    """
+    metadata = metadata or {}
+    return {"qa_id": int(metadata.get("qa_id", -1)), "category": str(metadata.get("category", ""))}
+
+
+class VectorStoreBackend:
+    """
+    interface of a versioned vector store backend.
+
+    every dataset change is built into a new shadow version while queries keep
+    using the active one, then activate switches to it in one step.
+    the store returned by get must provide similarity_search_with_score(query, k),
+    returning (Document, distance) pairs where a lower distance is a better match.
+    searches return the qa_id and category of every text as Document metadata.
+    """
+
+    def active_version(self) -> int | None:
+        raise NotImplementedError
+
+    def exists(self) -> bool:
+        return self.active_version() is not None
+
+    def ids(self) -> set[str]:
+        """ids stored in the active version"""
+        return set(self.metadatas())
+
+    def metadatas(self) -> dict:
+        """id -> metadata (see doc_metadata) of every text in the active version, {} for texts stored without"""
+        raise NotImplementedError
+
+    def vectors(self, ids: list[str]) -> dict:
+        """stored vectors of the given ids in the active version"""
+        raise NotImplementedError
+
+    def model_name(self) -> str | None:
+        """embedding model the active version was built with, None if it was not recorded"""
+        raise NotImplementedError
+
+    def build(self, version: int, ids: list[str], texts: list[str], vectors: list, metadatas: list[dict],
+              model_name: str | None = None):
+        """build a complete shadow version, not visible to queries yet"""
+        raise NotImplementedError
+
+    def activate(self, version: int, model_name: str | None = None):
+        """atomically point queries at the version and drop the previous one"""
+        raise NotImplementedError
+
+    def get(self):
+        raise NotImplementedError
+
+    def delete(self):
+        raise NotImplementedError
+
+    def search(self, embedding, k: int, ids: list[str] | None = None, categories: list[str] | None = None):
+        """
+        :param embedding: query embedding
+        :param k: number of results
+        :param ids: only search these documents, all documents if None
+        :param categories: only search documents of these categories, all categories if None
+        :return list: (Document, distance) pairs
+        """
+        if ids is not None or categories is not None:
+            raise NotImplementedError
+        return self.get().similarity_search_with_score_by_vector(embedding, k=k)
+
+    def search_many(self, embeddings, k: int):
+        """
+        :param embeddings: query embeddings
+        :param k: number of results per query
+        :return list: (Document, distance) pairs of every query, in order
+        """
+        return [self.search(embedding, k) for embedding in embeddings]
+
+    def load(self):
+        """bring the active version into memory so the first query does not pay for it"""
+        if self.exists():
+            self.get()
+
+    def health(self):
+        """raise if the backend cannot be reached"""
+        self.active_version()
+
+
+class MilvusBackend(VectorStoreBackend):
+    """
+    keeps every version in its own collection (qa_list_v{n}) and points the
+    collection alias (qa_list) at the active one. field names are the ones
+    langchain_milvus uses, so its Milvus wrapper can search through the alias.
+    category is the partition key: a search filtered by category only visits
+    the partitions of those categories.
+    """
+
+    def __init__(self, embedding_model, index_name, uri=MILVUS_URI):
+        from pymilvus import connections, utility
+        from langchain_milvus import Milvus
+
+        # a single attempt: readiness retries the whole component with backoff
+        connections.connect(uri=uri, timeout=MILVUS_CONNECT_TIMEOUT)
+        self._utility = utility
+        self._milvus = Milvus
+        self._store = None
+        self._collection = None
+        self.embedding_model = embedding_model
+        self.index_name = index_name
+
+    def _name(self, version):
+        return f"{self.index_name}_v{version}"
+
+    def _versions(self):
+        prefix = f"{self.index_name}_v"
+        return {
+            int(name[len(prefix):]): name
+            for name in self._utility.list_collections()
+            if name.startswith(prefix) and name[len(prefix):].isdigit()
+        }
+
+    def active_version(self):
+        for version, name in self._versions().items():
+            if self.index_name in self._utility.list_aliases(collection_name=name):
+                return version
+        return None
+
+    def _active_collection(self):
+        from pymilvus import Collection
+
+        version = self.active_version()
+        return None if version is None else Collection(self._name(version))
+
+    @staticmethod
+    def _metadata_fields(collection) -> list[str]:
+        # collections built before metadata was stored only have pk, text and vector
+        names = {field.name for field in collection.schema.fields}
+        return [name for name in ("qa_id", "category") if name in names]
+
+    def model_name(self):
+        collection = self._active_collection()
+        if collection is None:
+            return None
+        try:
+            return json.loads(collection.description).get("embedding_model")
+        except (TypeError, ValueError, AttributeError):
+            # collections built before the model was recorded have no JSON description
+            return None
+
+    def metadatas(self):
+        collection = self._active_collection()
+        if collection is None:
+            return {}
+        fields = self._metadata_fields(collection)
+        found = {}
+        # a single query is capped by Milvus (16384 rows), so page through the whole collection
+        iterator = collection.query_iterator(batch_size=MILVUS_QUERY_BATCH, expr='pk != ""', output_fields=["pk", *fields])
+        try:
+            while True:
+                rows = iterator.next()
+                if not rows:
+                    break
+                found.update({row["pk"]: {name: row[name] for name in fields} for row in rows})
+        finally:
+            iterator.close()
+        return found
+
+    def vectors(self, ids):
+        collection = self._active_collection()
+        found = {}
+        if collection is None:
+            return found
+        for start in range(0, len(ids), 1000):
+            chunk = list(ids[start:start + 1000])
+            rows = collection.query(expr=f"pk in {json.dumps(chunk)}", output_fields=["pk", "vector"])
+            found.update({row["pk"]: row["vector"] for row in rows})
+        return found
+
+    def build(self, version, ids, texts, vectors, metadatas, model_name=None):
+        from pymilvus import Collection, CollectionSchema, DataType, FieldSchema
+
+        name = self._name(version)
+        if self._utility.has_collection(name):
+            self._utility.drop_collection(name)
+        dim = len(vectors[0]) if vectors else 1
+        schema = CollectionSchema([
+            FieldSchema("pk", DataType.VARCHAR, is_primary=True, max_length=64),
+            FieldSchema("text", DataType.VARCHAR, max_length=65535),
+            FieldSchema("vector", DataType.FLOAT_VECTOR, dim=dim),
+            FieldSchema("qa_id", DataType.INT64),
+            FieldSchema("category", DataType.VARCHAR, max_length=512, is_partition_key=True),
+        ], description=json.dumps({"embedding_model": model_name}))
+        collection = Collection(name, schema, num_partitions=MILVUS_NUM_PARTITIONS)
+        for start in range(0, len(ids), 512):
+            end = start + 512
+            collection.insert([
+                ids[start:end],
+                texts[start:end],
+                [list(map(float, v)) for v in vectors[start:end]],
+                [m["qa_id"] for m in metadatas[start:end]],
+                [m["category"] for m in metadatas[start:end]],
+            ])
+        collection.flush()
+        collection.create_index("vector", self._index_params())
+        collection.load()
+
+    @staticmethod
+    def _index_params() -> dict:
+        if MILVUS_INDEX_TYPE == "HNSW":
+            params = {"M": MILVUS_HNSW_M, "efConstruction": MILVUS_HNSW_EF_CONSTRUCTION}
+        else:
+            params = {}
+        return {"index_type": MILVUS_INDEX_TYPE, "metric_type": "L2", "params": params}
+
+    @staticmethod
+    def _search_params(k: int) -> dict:
+        params = {"ef": max(MILVUS_HNSW_EF, k)} if MILVUS_INDEX_TYPE == "HNSW" else {}
+        return {"metric_type": "L2", "params": params}
+
+    def activate(self, version, model_name=None):
+        previous = self.active_version()
+        # collections created by Milvus.from_texts used the alias name itself
+        if self.index_name in self._utility.list_collections():
+            self._utility.drop_collection(self.index_name)
+        self._collection = None
+        if previous is None:
+            self._store = None
+            self._utility.create_alias(self._name(version), self.index_name)
+        else:
+            self._utility.alter_alias(self._name(version), self.index_name)
+        for old_version, name in self._versions().items():
+            if old_version != version:
+                self._utility.drop_collection(name)
+
+    def get(self):
+        # the wrapper searches through the alias, so it stays valid when the alias moves
+        if getattr(self._store, "col", None) is None:
+            self._store = self._milvus(
+                embedding_function=self.embedding_model,
+                collection_name=self.index_name
+            )
+        return self._store
+
+    def _search_collection(self):
+        from pymilvus import Collection
+
+        # the alias is resolved by the server, so the handle stays valid when it moves
+        if self._collection is None:
+            collection = Collection(self.index_name)
+            self._collection = (collection, ["text", *self._metadata_fields(collection)])
+        return self._collection
+
+    def _search(self, embeddings, k, ids=None, categories=None):
+        if (ids is not None and not ids) or (categories is not None and not categories):
+            return [[] for _ in embeddings]
+        collection, fields = self._search_collection()
+        filters = []
+        if ids is not None:
+            filters.append(f"pk in {json.dumps(list(ids))}")
+        if categories is not None:
+            if "category" not in fields:
+                # like the numpy index, texts stored without metadata belong to no category
+                return [[] for _ in embeddings]
+            # filtering on the partition key only searches the partitions of these categories
+            filters.append(f"category in {json.dumps(list(categories), ensure_ascii=False)}")
+        hits = collection.search(
+            data=[list(map(float, e)) for e in embeddings],
+            anns_field="vector",
+            param=self._search_params(k),
+            limit=k,
+            expr=" and ".join(filters) or None,
+            output_fields=fields,
+        )
+        return [
+            [
+                (Document(page_content=hit.entity.get("text"), metadata={name: hit.entity.get(name) for name in fields[1:]}), hit.distance)
+                for hit in query_hits
+            ]
+            for query_hits in hits
+        ]
+
+    def search(self, embedding, k, ids=None, categories=None):
+        return self._search([embedding], k, ids, categories)[0]
+
+    def search_many(self, embeddings, k):
+        if not embeddings:
+            return []
+        # one request for every query
+        return self._search(embeddings, k)
+
+    def load(self):
+        from pymilvus import Collection
+
+        if self.exists():
+            Collection(self.index_name).load()
+            self.get()
+
+    def health(self):
+        self._utility.list_collections()
+
+    def delete(self):
+        self._store = None
+        self._collection = None
+        previous = self.active_version()
+        if previous is not None:
+            self._utility.drop_alias(self.index_name)
+        for name in self._versions().values():
+            self._utility.drop_collection(name)
+        if self.index_name in self._utility.list_collections():
+            self._utility.drop_collection(self.index_name)
+
+
+class NumpyIndex:
+    """
+    in-process similarity index: a contiguous float32 matrix of l2-normalized
+    embeddings searched with one matrix product.
+    scores are squared l2 distances (2 - 2 * cosine), the same scale Milvus
+    reports for normalized embeddings, so thresholds carry over.
+    """
+
+    def __init__(self, embedding_model, texts: list[str], matrix: np.ndarray, metadatas: list[dict] | None = None):
+        self.embedding_model = embedding_model
+        self.texts = texts
+        self.matrix = matrix
+        self.metadatas = metadatas or [{} for _ in texts]
+        self._rows = None
+        self._category_rows = None
+
+    def rows(self, ids) -> np.ndarray:
+        """
+        :param ids: document ids
+        :return np.ndarray: row numbers of the ids in this index
+        """
+        if self._rows is None:
+            self._rows = {doc_id(text): i for i, text in enumerate(self.texts)}
+        return np.array(sorted({self._rows[i] for i in ids if i in self._rows}), dtype=np.int64)
+
+    def category_rows(self, categories) -> np.ndarray:
+        """
+        :param categories: category names
+        :return np.ndarray: row numbers of the texts of these categories
+        """
+        if self._category_rows is None:
+            by_category = {}
+            for i, metadata in enumerate(self.metadatas):
+                by_category.setdefault(metadata.get("category"), []).append(i)
+            self._category_rows = {c: np.array(rows, dtype=np.int64) for c, rows in by_category.items()}
+        parts = [self._category_rows[c] for c in categories if c in self._category_rows]
+        return np.sort(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+
+    def search_by_vectors(self, vectors, k: int = 4, rows: np.ndarray | None = None) -> list[list[tuple[int, float]]]:
+        """
+        batched top-k search.
+
+        :param vectors: query embeddings, one per row
+        :param k: number of results per query
+        :param rows: only search these rows (see rows), all rows if None
+        :return list: for every query, (row index, distance) pairs, best first
+        """
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        if len(self.texts) == 0 or matrix.shape[0] == 0:
+            return [[] for _ in range(len(vectors))]
+        queries = normalize_rows(vectors)
+        similarity = queries @ matrix.T
+        k = min(k, similarity.shape[1])
+        # argpartition picks the top k without sorting the whole row
+        top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in zip(similarity, top):
+            candidates = candidates[np.argsort(-row[candidates])]
+            index = candidates if rows is None else rows[candidates]
+            results.append([(int(i), float(2.0 - 2.0 * row[c])) for i, c in zip(index, candidates)])
+        return results
+
+    def _document(self, i: int) -> Document:
+        return Document(page_content=self.texts[i], metadata=self.metadatas[i])
+
+    def similarity_search_with_score_by_vector(self, embedding, k: int = 4, ids: list[str] | None = None,
+                                               categories: list[str] | None = None):
+        rows = None if ids is None else self.rows(ids)
+        if categories is not None:
+            in_categories = self.category_rows(categories)
+            rows = in_categories if rows is None else np.intersect1d(rows, in_categories)
+        return [(self._document(i), score) for i, score in self.search_by_vectors([embedding], k, rows=rows)[0]]
+
+    def similarity_search_with_score_by_vectors(self, embeddings, k: int = 4):
+        return [
+            [(self._document(i), score) for i, score in results]
+            for results in self.search_by_vectors(embeddings, k)
+        ]
+
+    def similarity_search_with_score(self, query: str, k: int = 4):
+        return self.similarity_search_with_score_by_vector(self.embedding_model.embed_query(query), k)
+
+
+class NumpyBackend(VectorStoreBackend):
+    """
+    keeps the index in process. every version is persisted as a memory-mapped
+    .npy file plus the matching texts and metadata, and a small pointer file
+    names the active version and the embedding model it was built with, so no
+    Milvus server is needed.
+
+    the pointer is checked (one stat) on every read, so a worker switches to
+    a version activated by another worker with its next query.
+    """
+
+    def __init__(self, embedding_model, index_name, index_dir=NUMPY_INDEX_DIR):
+        self.embedding_model = embedding_model
+        self.index_name = index_name
+        self.index_dir = index_dir
+        self.pointer_path = os.path.join(index_dir, f"{index_name}_index_active.json")
+        self.index = None
+        self.version = None
+        # (mtime, size, inode) of the pointer file and its content
+        self._pointer = (None, {})
+
+    def _paths(self, version):
+        base = os.path.join(self.index_dir, f"{self.index_name}_v{version}")
+        return f"{base}_index.npy", f"{base}_index_texts.json", f"{base}_index_metadata.json"
+
+    def _read_pointer(self) -> dict:
+        try:
+            stat = os.stat(self.pointer_path)
+        except FileNotFoundError:
+            return {}
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        cached_signature, pointer = self._pointer
+        if signature != cached_signature:
+            try:
+                with open(self.pointer_path, "r", encoding="utf-8") as f:
+                    pointer = json.load(f)
+            except FileNotFoundError:
+                return {}
+            self._pointer = (signature, pointer)
+        return pointer
+
+    def active_version(self):
+        return self._read_pointer().get("version")
+
+    def model_name(self):
+        # pointers written before the model was recorded only hold the version
+        return self._read_pointer().get("model")
+
+    def metadatas(self):
+        if not self.exists():
+            return {}
+        index = self.get()
+        return {doc_id(text): metadata for text, metadata in zip(index.texts, index.metadatas)}
+
+    def vectors(self, ids):
+        if not self.exists():
+            return {}
+        index = self.get()
+        rows = {doc_id(text): i for i, text in enumerate(index.texts)}
+        return {i: index.matrix[rows[i]] for i in ids if i in rows}
+
+    def build(self, version, ids, texts, vectors, metadatas, model_name=None):
+        matrix = normalize_rows(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        matrix_path, texts_path, metadata_path = self._paths(version)
+        write_atomic(matrix_path, lambda f: np.save(f, matrix))
+        write_atomic(texts_path, lambda f: f.write(json.dumps(list(texts), ensure_ascii=False).encode("utf-8")))
+        write_atomic(metadata_path, lambda f: f.write(json.dumps(list(metadatas), ensure_ascii=False).encode("utf-8")))
+
+    def activate(self, version, model_name=None):
+        previous = self.active_version()
+        pointer = {"version": version, "model": model_name}
+        write_atomic(self.pointer_path, lambda f: f.write(json.dumps(pointer).encode("utf-8")))
+        # queries holding the previous index keep using it until they finish
+        self.index, self.version = self._load(version), version
+        if previous is not None and previous != version:
+            self._remove(previous)
+
+    def _load(self, version):
+        matrix_path, texts_path, metadata_path = self._paths(version)
+        with open(texts_path, "r", encoding="utf-8") as f:
+            texts = json.load(f)
+        metadatas = None
+        # versions built before metadata was stored have no metadata file
+        if os.path.exists(metadata_path):
+            with open(metadata_path, "r", encoding="utf-8") as f:
+                metadatas = json.load(f)
+        matrix = np.load(matrix_path, mmap_mode="r")
+        return NumpyIndex(self.embedding_model, texts, matrix, metadatas)
+
+    def search(self, embedding, k, ids=None, categories=None):
+        return self.get().similarity_search_with_score_by_vector(embedding, k=k, ids=ids, categories=categories)
+
+    def search_many(self, embeddings, k):
+        if len(embeddings) == 0:
+            return []
+        return self.get().similarity_search_with_score_by_vectors(embeddings, k=k)
+
+    def get(self):
+        version = self.active_version()
+        if self.index is None or version != self.version:
+            try:
+                index = self._load(version)
+            except FileNotFoundError:
+                # another worker activated a newer version and removed this one meanwhile
+                version = self.active_version()
+                index = self._load(version)
+            self.index, self.version = index, version
+        return self.index
+
+    def _remove(self, version):
+        for path in self._paths(version):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def delete(self):
+        version = self.active_version()
+        self.index, self.version = None, None
+        if os.path.exists(self.pointer_path):
+            os.remove(self.pointer_path)
+        if version is not None:
+            self._remove(version)
+
+
+BACKENDS = {
+    "milvus": MilvusBackend,
+    "numpy": NumpyBackend,
+}
 
-connections.connect(uri="http://localhost:19530")
 
 class Vector_store:
-    def __init__(self,embedding_model,index_name):
+    def __init__(self,embedding_model,index_name,backend=None,embed_batch_size=64,model_name=None):
         self.embedding_model = embedding_model
         self.index_name = index_name
-    
+        # recorded with every version, stored vectors of another model are never reused
+        self.model_name = model_name
+        self.embed_batch_size = embed_batch_size
+        backend = backend or VECTOR_BACKEND
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown vector store backend: {backend}")
+        self.backend_name = backend
+        self._backend = None
+        self._backend_lock = threading.Lock()
+        # only one version is built at a time, also across the workers of this host
+        self._build_lock = FileLock(os.path.join(BUILD_LOCK_DIR, f"{index_name}_build.lock"))
+
+    @property
+    def backend(self) -> VectorStoreBackend:
+        # the backend connects on first use, not when the router is imported
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = BACKENDS[self.backend_name](self.embedding_model, self.index_name)
+        return self._backend
+
+    def load_vector_store(self):
+        self.backend.load()
+
+    def health(self):
+        self.backend.health()
+
     def vector_store_exists(self):
-        return utility.has_collection(self.index_name)
-    
+        return self.backend.exists()
+
+    def active_version(self):
+        return self.backend.active_version()
+
+    def stored_model(self):
+        """
+        :return str|None: embedding model the active version was built with, None if unknown
+        """
+        return self.backend.model_name()
+
+    def sync_vector_store(self, documents, progress=None, metadatas=None, vectors=None):
+        """
+        build a new version of the index holding the given documents and switch
+        queries to it once it is complete. vectors of documents which are
+        already indexed are reused, only new documents are embedded.
+
+        :param documents: texts which should be in the index
+        :param progress: optional callback receiving the progress between 0 and 1
+        :param metadatas: qa_id and category of every document (see doc_metadata)
+        :param vectors: optional id -> vector dict; documents found in it are not embedded
+            again, and the vector of every document is added to it
+        :return dict: number of added, removed, relabelled, unchanged and embedded documents and the active version
+        """
+        progress = progress or (lambda value: None)
+        metadatas = metadatas or [None] * len(documents)
+        known = vectors if vectors is not None else {}
+        with self._build_lock:
+            wanted = {doc_id(text): text for text in documents}
+            wanted_metadata = {doc_id(text): doc_metadata(m) for text, m in zip(documents, metadatas)}
+            exists = self.backend.exists()
+            # vectors of an index built with another (or an unrecorded) model are embedded again
+            reuse_stored = exists and (self.model_name is None or self.backend.model_name() == self.model_name)
+            current = self.backend.metadatas() if exists else {}
+            added = [i for i in wanted if i not in current]
+            removed = [i for i in current if i not in wanted]
+            # a paraphrase moved to another qa item keeps its vector but needs a new version
+            relabelled = [i for i in wanted if i in current and current[i] != wanted_metadata[i]]
+            changes = {
+                "added": len(added),
+                "removed": len(removed),
+                "relabelled": len(relabelled),
+                "unchanged": len(wanted) - len(added) - len(relabelled),
+                "embedded": 0,
+            }
+            if reuse_stored and not added and not removed and not relabelled:
+                if vectors is not None:
+                    known.update(self.backend.vectors([i for i in wanted if i not in known]))
+                progress(1.0)
+                return {**changes, "version": self.backend.active_version()}
+
+            if reuse_stored:
+                known.update(self.backend.vectors([i for i in wanted if i in current and i not in known]))
+            missing = [i for i in wanted if i not in known]
+            changes["embedded"] = len(missing)
+            for start in range(0, len(missing), self.embed_batch_size):
+                batch = missing[start:start + self.embed_batch_size]
+                with span("rebuild_embed"):
+                    embedded = self.embedding_model.embed_documents([wanted[i] for i in batch])
+                known.update(zip(batch, embedded))
+                progress(0.8 * (start + len(batch)) / len(missing))
+
+            ids = list(wanted)
+            version = (self.backend.active_version() or 0) + 1
+            with span("rebuild_index"):
+                self.backend.build(
+                    version, ids, [wanted[i] for i in ids], [known[i] for i in ids], [wanted_metadata[i] for i in ids],
+                    self.model_name,
+                )
+            progress(0.9)
+            self.backend.activate(version, self.model_name)
+            progress(1.0)
+            return {**changes, "version": version}
+
     def create_vector_store(self,document):
-        return Milvus.from_texts(
-            texts=document,
-            embedding=self.embedding_model,
-            collection_name=self.index_name
-        )
+        self.sync_vector_store(document)
+        return self.backend.get()
+
     def get_vector_store(self):
-        return Milvus(
-            embedding_function=self.embedding_model,
-            collection_name=self.index_name
-        )
+        return self.backend.get()
+
+    def search_by_vector(self, embedding, k: int, ids: list[str] | None = None, categories: list[str] | None = None):
+        """
+        :param embedding: query embedding
+        :param k: number of results
+        :param ids: only search these documents (see doc_id), all documents if None
+        :param categories: only search documents of these categories, all categories if None
+        :return list: (Document, distance) pairs, the Document metadata holds qa_id and category
+        """
+        return self.backend.search(embedding, k, ids, categories)
+
+    def search_by_vectors(self, embeddings, k: int):
+        """
+        search several queries with one call to the backend.
+
+        :param embeddings: query embeddings
+        :param k: number of results per query
+        :return list: (Document, distance) pairs of every query, in order
+        """
+        return self.backend.search_many(embeddings, k)
+
     def delete_vector_store(self):
-        if utility.has_collection(collection_name=self.index_name):
-            utility.drop_collection(collection_name=self.index_name)
-        print(f"Collection {self.index_name} deleted")
-    
+        with self._build_lock:
+            self.backend.delete()
+        logger.info("collection deleted", extra={"fields": {"collection": self.index_name}})
+
     def update_vector_store(self,new_document):
-        self.delete_vector_store()
-        self.create_vector_store(new_document)
-        print(f"Collection {self.index_name} updated with new document")
+        changes = self.sync_vector_store(new_document)
+        logger.info("collection updated", extra={"fields": {"collection": self.index_name, **changes}})
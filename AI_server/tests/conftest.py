@@ -0,0 +1,67 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+AI_SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = tempfile.mkdtemp(prefix="ai-server-tests-")
+
+# read at import time by the services; the index, caches and locks live in WORK_DIR
+# and Ollama, Milvus and the classifier pickles are not needed
+os.environ.update({
+    "VECTOR_BACKEND": "numpy",
+    "NUMPY_INDEX_DIR": WORK_DIR,
+    "BUILD_LOCK_DIR": WORK_DIR,
+    "SNAPSHOT_DIR": "",
+    "EMBED_CACHE_PATH": "",
+    "SESSION_BACKEND": "memory",
+    "CLASSIFIER_ENABLED": "0",
+})
+# the dataset paths are relative to AI_server
+os.chdir(AI_SERVER_DIR)
+sys.path.insert(0, AI_SERVER_DIR)
+
+import pytest
+from fastapi.testclient import TestClient
+from benchmark.fakes import FakeEmbeddings
+from services.concurrency import FileLock
+from services.model import get_model, CHAT_EMBED_MODEL, CATEGORY_EMBED_MODEL
+from services.qa_repository import QARepository
+
+# clients are created lazily, so the fakes are in place before the app embeds anything
+for _name in dict.fromkeys([CHAT_EMBED_MODEL, CATEGORY_EMBED_MODEL]):
+    get_model(_name).client.factory = lambda: FakeEmbeddings(dim=64)
+
+
+@pytest.fixture(scope="session")
+def client():
+    import main
+
+    with TestClient(main.app) as test_client:
+        # components are warmed up in the background after startup
+        deadline = time.monotonic() + 60
+        while test_client.get("/ready").status_code != 200:
+            assert time.monotonic() < deadline, test_client.get("/ready").json()
+            time.sleep(0.05)
+        yield test_client
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """
+    copies of QA_list.json, categories.json and questions.json the endpoints
+    of one test read and write
+    """
+    from routers import category, chat
+
+    shutil.copy(os.path.join("background_docs", "QA_list.json"), tmp_path / "QA_list.json")
+    shutil.copy(category.CATEGORIES_PATH, tmp_path / "categories.json")
+    shutil.copy(category.QUESTIONS_PATH, tmp_path / "questions.json")
+    monkeypatch.setattr(chat, "qa_repository", QARepository(str(tmp_path / "QA_list.json")))
+    monkeypatch.setattr(category, "CATEGORIES_PATH", str(tmp_path / "categories.json"))
+    monkeypatch.setattr(category, "QUESTIONS_PATH", str(tmp_path / "questions.json"))
+    monkeypatch.setattr(category, "_category_write_lock", FileLock(str(tmp_path / "categories.json.lock")))
+    # read again from the copies on first use
+    monkeypatch.setattr(category, "category_index", None)
+    return tmp_path
@@ -0,0 +1,25 @@
+import sqlite3
+from services.cache import EmbeddingCache
+
+
+def test_disk_tier_keeps_the_newest_rows_up_to_the_cap(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    cache = EmbeddingCache("m", max_entries=1, disk_path=path, max_disk_entries=3)
+    for i in range(5):
+        cache.put(f"q{i}", [float(i), 1.0])
+
+    stats = cache.stats()["disk"]
+    assert stats["entries"] == 3
+    assert stats["evictions"] == 2
+
+    reopened = EmbeddingCache("m", max_entries=1, disk_path=path, max_disk_entries=3)
+    assert reopened.get("q0") is None
+    assert reopened.get("q4") == [4.0, 1.0]
+    assert reopened.get("q2") == [2.0, 1.0]
+
+
+def test_disk_tier_is_opened_in_wal_mode(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    EmbeddingCache("m", disk_path=path).put("q", [1.0])
+    (mode,) = sqlite3.connect(path).execute("PRAGMA journal_mode").fetchone()
+    assert mode == "wal"
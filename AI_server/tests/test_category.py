@@ -0,0 +1,53 @@
+import json
+
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def total(counts: dict) -> int:
+    return sum(counts.values())
+
+
+def test_add_and_remove_questions_change_the_file_and_the_counts(client, data_dir):
+    questions_path = data_dir / "questions.json"
+    before = read_json(questions_path)
+    counts_before = client.get("/category/cat_all_count").json()
+    assert total(counts_before) == len(before)
+
+    new = ["how do i write a cover letter for a graduate role", "where can i find volunteering work"]
+    response = client.post("/category/add_questions", json={"questions": new})
+    assert response.json() == {"message": "Questions added successfully."}
+    assert read_json(questions_path) == before + new
+    assert total(client.get("/category/cat_all_count").json()) == len(before) + 2
+
+    response = client.post("/category/add_questions", json={"questions": new})
+    assert response.json() == {"message": "Questions already exist or invalid."}
+
+    response = client.post("/category/remove_questions", json={"questions": new[:1]})
+    assert response.json() == {"message": "Questions removed successfully."}
+    assert read_json(questions_path) == before + new[1:]
+    assert total(client.get("/category/cat_all_count").json()) == len(before) + 1
+
+    response = client.post("/category/remove_questions", json={"questions": ["not a stored question"]})
+    assert response.json() == {"message": "Questions not found or invalid."}
+
+
+def test_add_and_remove_category(client, data_dir):
+    categories_path = data_dir / "categories.json"
+    before = read_json(categories_path)
+
+    assert client.post("/category/add", json={"category": "Postgraduate Study"}).json() == {
+        "message": "Categories updated successfully."
+    }
+    assert read_json(categories_path) == before + ["Postgraduate Study"]
+    assert "Postgraduate Study" in client.get("/category/list").json()
+    assert client.post("/category/add", json={"category": "Postgraduate Study"}).json() == {
+        "message": "Category already exists or invalid."
+    }
+
+    assert client.post("/category/remove", json={"category": "Postgraduate Study"}).json() == {
+        "message": "Category removed successfully."
+    }
+    assert read_json(categories_path) == before
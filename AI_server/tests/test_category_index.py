@@ -0,0 +1,53 @@
+from benchmark.fakes import FakeEmbeddings
+from services.category_index import CategoryIndex
+
+CATEGORIES = ["salary and pay", "remote work", "interview tips"]
+QUESTIONS = [
+    "how much pay for a junior developer",
+    "can I work remote from home",
+    "tips for my first interview",
+    "salary of a data scientist",
+    "what should I wear to the interview",
+    "is remote work possible in this company",
+]
+
+
+def make_index(categories=CATEGORIES, questions=QUESTIONS):
+    return CategoryIndex(FakeEmbeddings(dim=64), categories, questions, threshold=0.3)
+
+
+def assert_matches_full_recount(index):
+    fresh = make_index(index.categories, index.questions)
+    assert index.count_all() == fresh.count_all()
+    assert index.group() == fresh.group()
+    for category in index.categories:
+        assert index.count_category(category) == fresh.count_category(category)
+
+
+def test_incremental_counts_match_a_full_recount():
+    index = make_index()
+    index.ensure_loaded()
+    version = index.counts_version
+
+    index.add_category("career change")
+    assert_matches_full_recount(index)
+    index.add_questions(["how do I change my career", "pay raise negotiation"])
+    assert_matches_full_recount(index)
+    index.remove_category("remote work")
+    assert_matches_full_recount(index)
+    index.remove_questions(["tips for my first interview", "salary of a data scientist"])
+    assert_matches_full_recount(index)
+    assert index.counts_version == version + 4
+
+
+def test_changes_only_embed_the_new_rows():
+    index = make_index()
+    index.ensure_loaded()
+    embeddings = index.embedding_model
+    embedded = embeddings.texts
+
+    index.add_category("career change")
+    index.remove_category("career change")
+    index.remove_questions(["tips for my first interview"])
+    assert embeddings.texts - embedded == 1
+    assert sum(index.count_all().values()) == len(QUESTIONS) - 1
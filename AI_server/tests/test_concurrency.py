@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from services.concurrency import RequestLimiter
+
+
+def test_requests_beyond_the_queue_are_rejected_with_503():
+    limiter = RequestLimiter(max_concurrent=1, max_waiting=1, timeout=5)
+    release = asyncio.Event()
+
+    async def handler():
+        await release.wait()
+        return "done"
+
+    async def scenario():
+        first = asyncio.create_task(limiter.run(handler()))
+        second = asyncio.create_task(limiter.run(handler()))
+        await asyncio.sleep(0.01)
+        assert limiter.in_flight == 1 and limiter.waiting == 1
+        with pytest.raises(HTTPException) as rejected:
+            await limiter.run(handler())
+        release.set()
+        return rejected.value.status_code, await first, await second
+
+    assert asyncio.run(scenario()) == (503, "done", "done")
+    assert limiter.stats()["rejected"] == 1
+    assert limiter.in_flight == 0 and limiter.waiting == 0
+
+
+def test_slow_requests_fail_with_504():
+    limiter = RequestLimiter(max_concurrent=1, max_waiting=10, timeout=0.05)
+
+    async def scenario():
+        # the first times out running, the second times out waiting for the slot
+        return await asyncio.gather(
+            limiter.run(asyncio.sleep(1)), limiter.run(asyncio.sleep(1)), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert [result.status_code for result in results] == [504, 504]
+    assert limiter.stats()["timed_out"] == 2
+    # the slot is free again
+    assert asyncio.run(limiter.run(asyncio.sleep(0, "ok"))) == "ok"
@@ -0,0 +1,33 @@
+from langchain_core.documents import Document
+from routers import chat
+
+
+def test_delete_renumbers_and_the_next_id_follows_the_list_length(client, data_dir):
+    items = client.get("/chat/get_all_qa").json()
+    moved = items[3]
+
+    assert client.request("DELETE", "/chat/del", json={"id": 3}).json()["message"] == "Delete item successfully."
+    remaining = client.get("/chat/get_all_qa").json()
+    assert [item["id"] for item in remaining] == list(range(1, len(items)))
+    assert remaining[2]["answer"] == moved["answer"]
+
+    # the dashboard numbers a new item after the length of its list
+    new_qa = {"id": len(remaining) + 1, "questions": ["new question"], "answer": "new answer",
+              "category": "General", "common": False}
+    assert client.get("/chat/index").json() == len(remaining) + 1
+    assert client.post("/chat/add", json=new_qa).json()["message"] == "Add new item successfully."
+    assert client.post("/chat/add", json={**new_qa, "id": 1}).json() == {"message": "index error"}
+
+
+def test_a_stored_qa_id_is_only_trusted_while_the_paraphrase_belongs_to_the_item(client, data_dir):
+    items = chat.qa_repository.all()
+    item = items[3]
+    question = chat.normalize(item["questions"][0])
+    document = Document(page_content=question, metadata={"qa_id": item["id"], "category": item["category"]})
+    assert chat.resolve_document(document)["answer"] == item["answer"]
+
+    # after the delete the id belongs to the next item, whose questions differ
+    assert chat.qa_repository.delete(items[2]["id"])
+    assert chat.qa_repository.get(item["id"])["answer"] != item["answer"]
+    resolved = chat.resolve_document(document)
+    assert resolved is None or resolved["answer"] == item["answer"]
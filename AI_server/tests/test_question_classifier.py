@@ -0,0 +1,45 @@
+import pickle
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from services.question_classifier import QuestionClassifier
+
+QUESTIONS = ["book an appointment", "career advice please", "review my cv", "cover letter help", "book a slot", "resume check"]
+LABELS = ["Appointments", "Appointments", "CV / Resume Help", "CV / Resume Help", "Appointments", "CV / Resume Help"]
+
+
+def write_artifacts(directory, vectorizer, classifier):
+    with open(directory / "question_vectorizer.pkl", "wb") as f:
+        pickle.dump(vectorizer, f)
+    with open(directory / "question_classifier.pkl", "wb") as f:
+        pickle.dump(classifier, f)
+
+
+def test_binary_model_matches_predict_proba(tmp_path):
+    vectorizer = TfidfVectorizer().fit(QUESTIONS)
+    classifier = LogisticRegression().fit(vectorizer.transform(QUESTIONS), LABELS)
+    write_artifacts(tmp_path, vectorizer, classifier)
+
+    model = QuestionClassifier(str(tmp_path), enabled=True)
+    for question in ["book my cv", "letter", "advice"]:
+        label, probability = model.predict(question)
+        expected = classifier.predict_proba(vectorizer.transform([question]))[0]
+        assert label == classifier.classes_[expected.argmax()]
+        assert probability == pytest.approx(expected.max())
+
+
+class Unloadable:
+    def __reduce__(self):
+        # what a pickle of another scikit-learn version may do while loading
+        return (__import__, ("sklearn.module_that_does_not_exist",))
+
+
+@pytest.mark.parametrize("artifact", [Unloadable(), np.float64])
+def test_any_load_failure_disables_the_classifier(tmp_path, artifact):
+    write_artifacts(tmp_path, artifact, artifact)
+    model = QuestionClassifier(str(tmp_path), enabled=True)
+
+    assert model.predict("review my cv") is None
+    assert not model.available
+    assert model.error
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+from benchmark.fakes import FakeEmbeddings
+from services.model import EmbeddingScheduler
+
+
+class RecordingEmbeddings(FakeEmbeddings):
+    def __init__(self):
+        super().__init__(dim=8)
+        self.threads = []
+
+    def embed_documents(self, texts):
+        self.threads.append(threading.current_thread().name)
+        return super().embed_documents(texts)
+
+
+def test_batches_run_on_the_blocking_pool():
+    embeddings = RecordingEmbeddings()
+    scheduler = EmbeddingScheduler(embeddings, window_ms=1)
+
+    async def scenario():
+        return await scheduler.embed("hello")
+
+    vector = asyncio.run(scenario())
+    assert vector == embeddings.embed_query("hello")
+    assert embeddings.threads[0].startswith("blocking")
+
+
+def test_concurrent_queries_share_one_batch():
+    embeddings = FakeEmbeddings(dim=8)
+    scheduler = EmbeddingScheduler(embeddings, window_ms=50, max_batch=8)
+
+    async def scenario():
+        return await asyncio.gather(*(scheduler.embed(text) for text in ["a", "b", "a", "c"]))
+
+    vectors = asyncio.run(scenario())
+    # the duplicate is embedded once
+    assert (embeddings.calls, embeddings.texts) == (1, 3)
+    assert scheduler.stats()["batches"] == 1
+    assert scheduler.stats()["max_fill"] == 4
+    assert vectors == [embeddings.embed_query(text) for text in ["a", "b", "a", "c"]]
+
+
+def test_a_full_batch_does_not_wait_for_the_window():
+    scheduler = EmbeddingScheduler(FakeEmbeddings(dim=8), window_ms=10000, max_batch=2)
+
+    async def scenario():
+        return await asyncio.wait_for(asyncio.gather(scheduler.embed("a"), scheduler.embed("b")), 5)
+
+    assert len(asyncio.run(scenario())) == 2
+    assert scheduler.stats()["batches"] == 1
+
+
+def test_a_failing_batch_fails_every_waiting_query():
+    class Broken:
+        def embed_documents(self, texts):
+            raise ConnectionError("ollama is down")
+
+    scheduler = EmbeddingScheduler(Broken(), window_ms=20)
+
+    async def scenario():
+        return await asyncio.gather(scheduler.embed("a"), scheduler.embed("b"), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ConnectionError) for result in results)
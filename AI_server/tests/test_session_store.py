@@ -0,0 +1,59 @@
+import time
+import pytest
+from services.session_store import MemorySessionBackend, SqliteSessionBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    backends = []
+
+    def make(**kwargs):
+        if request.param == "memory":
+            backend = MemorySessionBackend(**kwargs)
+        else:
+            # flushed by the reads, the sweep runs on every flush
+            backend = SqliteSessionBackend(
+                path=str(tmp_path / "sessions.sqlite3"), flush_ms=10000, sweep_s=0, **kwargs
+            )
+        backends.append(backend)
+        return backend
+
+    yield make
+    for backend in backends:
+        backend.close()
+
+
+def test_turns_are_kept_up_to_max_turns(make_backend):
+    backend = make_backend(max_turns=2)
+    for i in range(3):
+        backend.append("u1", f"q{i}", f"a{i}")
+    assert backend.get("u1").get_history() == [
+        {"question": "q1", "answer": "a1"},
+        {"question": "q2", "answer": "a2"},
+    ]
+    assert backend.pop("u1") is not None
+    assert backend.get("u1") is None
+
+
+def test_idle_sessions_expire(make_backend):
+    backend = make_backend(ttl=0.05)
+    backend.append("u1", "q", "a")
+    assert backend.get("u1") is not None
+    time.sleep(0.1)
+    assert backend.get("u1") is None
+    assert backend.stats()["live_sessions"] == 0
+
+
+def test_least_recently_used_sessions_are_evicted(make_backend):
+    backend = make_backend(max_sessions=2)
+    backend.append("u1", "q", "a")
+    time.sleep(0.01)
+    backend.append("u2", "q", "a")
+    time.sleep(0.01)
+    # reading u1 makes u2 the least recently used
+    backend.get("u1")
+    time.sleep(0.01)
+    backend.append("u3", "q", "a")
+    assert backend.get("u2") is None
+    assert backend.get("u1") is not None and backend.get("u3") is not None
+    assert backend.stats()["evictions"] == 1
@@ -0,0 +1,29 @@
+import asyncio
+import threading
+from services.startup import Readiness
+
+
+def test_start_returns_before_the_components_are_warm():
+    release = threading.Event()
+    calls = []
+
+    def slow_warm_up():
+        calls.append(1)
+        release.wait(5)
+
+    async def scenario():
+        readiness = Readiness()
+        readiness.register("slow", slow_warm_up, lambda: None)
+        await readiness.start()
+        # the lifespan is not held up, /ready would answer 503 now
+        assert not readiness.ready
+        release.set()
+        for _ in range(200):
+            if readiness.ready:
+                break
+            await asyncio.sleep(0.01)
+        await readiness.stop()
+        return readiness.ready
+
+    assert asyncio.run(scenario())
+    assert calls == [1]
@@ -0,0 +1,52 @@
+import pytest
+from benchmark.fakes import FakeEmbeddings
+from services.vector_store import NumpyBackend, Vector_store
+
+
+@pytest.fixture
+def make_store(tmp_path):
+    embeddings = FakeEmbeddings(dim=16)
+
+    def make(model_name="fake"):
+        store = Vector_store(embeddings, "test", backend="numpy", model_name=model_name)
+        store._backend = NumpyBackend(embeddings, "test", index_dir=str(tmp_path))
+        return store
+
+    return make, embeddings
+
+
+def test_sync_only_embeds_new_documents(make_store):
+    make, embeddings = make_store
+    store = make()
+    first = store.sync_vector_store(["a", "b", "c"], metadatas=[{"qa_id": 1}, {"qa_id": 1}, {"qa_id": 2}])
+    assert (first["added"], first["embedded"], first["version"]) == (3, 3, 1)
+
+    embedded = embeddings.texts
+    changes = store.sync_vector_store(
+        ["a", "b", "d"], metadatas=[{"qa_id": 1}, {"qa_id": 2}, {"qa_id": 3}]
+    )
+    assert changes == {"added": 1, "removed": 1, "relabelled": 1, "unchanged": 1, "embedded": 1, "version": 2}
+    assert embeddings.texts - embedded == 1
+
+    results = store.search_by_vector(embeddings.embed_query("b"), k=1)
+    document, _ = results[0]
+    assert document.page_content == "b" and document.metadata["qa_id"] == 2
+
+
+def test_sync_without_changes_keeps_the_version(make_store):
+    make, embeddings = make_store
+    store = make()
+    store.sync_vector_store(["a", "b"])
+    embedded = embeddings.texts
+    changes = store.sync_vector_store(["b", "a"])
+    assert changes["version"] == 1 and changes["unchanged"] == 2 and changes["embedded"] == 0
+    assert embeddings.texts == embedded
+
+
+def test_sync_embeds_again_when_the_model_changed(make_store):
+    make, _ = make_store
+    make("old").sync_vector_store(["a", "b"])
+    store = make("new")
+    changes = store.sync_vector_store(["a", "b"])
+    assert changes["embedded"] == 2 and changes["version"] == 2
+    assert store.stored_model() == "new"
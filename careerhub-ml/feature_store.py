@@ -0,0 +1,102 @@
+"""Embedding feature store for the training scripts.
+
+Every text is encoded once per model. Embeddings are kept in a memory-mapped
+.npy file next to a JSON list of row keys (sha256 of the text), one pair of
+files per model name, so later runs only encode new or changed questions.
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Callable, List, Optional
+
+import numpy as np
+
+STORE_DIR = "feature_store"
+
+
+def text_key(text: str) -> str:
+    """Stable key of a text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class FeatureStore:
+    """Embeddings of one model, keyed by text hash."""
+
+    def __init__(self, model_name: str, store_dir: str = STORE_DIR):
+        self.model_name = model_name
+        self.store_dir = store_dir
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.matrix_path = os.path.join(store_dir, f"{slug}.npy")
+        self.keys_path = os.path.join(store_dir, f"{slug}_keys.json")
+        self.matrix: Optional[np.ndarray] = None
+        self.rows = {}
+        self._load()
+
+    def _load(self):
+        if not (os.path.exists(self.matrix_path) and os.path.exists(self.keys_path)):
+            return
+        with open(self.keys_path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        if stored.get("model") != self.model_name:
+            return
+        matrix = np.load(self.matrix_path, mmap_mode="r")
+        if len(matrix) != len(stored["keys"]):
+            # a run stopped between the two writes, start again
+            return
+        self.matrix = matrix
+        self.rows = {key: i for i, key in enumerate(stored["keys"])}
+
+    @staticmethod
+    def _write(path: str, write):
+        # Write to a temporary file first so a crash never leaves a half written file.
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+
+    def _append(self, keys: List[str], vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        matrix = vectors if self.matrix is None else np.concatenate([self.matrix, vectors])
+        all_keys = list(self.rows) + keys
+        # release the old memory map before its file is replaced
+        self.matrix = None
+        os.makedirs(self.store_dir, exist_ok=True)
+        self._write(self.matrix_path, lambda f: np.save(f, matrix))
+        self._write(
+            self.keys_path,
+            lambda f: f.write(json.dumps({"model": self.model_name, "keys": all_keys}).encode("utf-8")),
+        )
+        self.matrix = np.load(self.matrix_path, mmap_mode="r")
+        self.rows = {key: i for i, key in enumerate(all_keys)}
+
+    def missing(self, texts: List[str]) -> List[str]:
+        """Distinct texts which are not in the store yet."""
+        return [text for text in dict.fromkeys(texts) if text_key(text) not in self.rows]
+
+    def encode(self, texts: List[str], encoder: Callable[[], Callable[[List[str]], np.ndarray]]) -> np.ndarray:
+        """Return one embedding row per text, encoding only the texts not in the store.
+
+        encoder is a factory returning the encode function, it is only called
+        when something has to be encoded, so a fully cached run never loads the model.
+        """
+        missing = self.missing(texts)
+        if missing:
+            print(f"Encoding {len(missing)} new texts with {self.model_name} ({len(self.rows)} cached)...")
+            encode = encoder()
+            self._append([text_key(text) for text in missing], encode(missing))
+        else:
+            print(f"All {len(texts)} texts found in the feature store.")
+        if not texts:
+            return np.zeros((0, 0 if self.matrix is None else self.matrix.shape[1]), dtype=np.float32)
+        return np.asarray(self.matrix[[self.rows[text_key(text)] for text in texts]])
+
+    def prune(self, texts: List[str]):
+        """Drop the rows of every text which is not in texts."""
+        keep = [text_key(text) for text in dict.fromkeys(texts) if text_key(text) in self.rows]
+        if len(keep) == len(self.rows):
+            return
+        vectors = np.asarray(self.matrix[[self.rows[key] for key in keep]])
+        self.matrix, self.rows = None, {}
+        self._append(keep, vectors)
@@ -0,0 +1,102 @@
+"""Rule-based final_category labels shared by the training scripts."""
+
+import re
+from typing import Tuple
+
+import pandas as pd
+
+# Columns the source category is read from, in order of preference.
+SOURCE_COLUMNS = [
+    "category",
+    "catergory",
+    "final category",
+    "final_category",
+    "final questions",
+    "final_questions",
+]
+
+
+def make_final_category(category: str, question: str) -> str:
+    """Map a free-text source category and question to one of the final categories."""
+    cat = str(category).lower()
+    q = str(question).lower()
+
+    # CV / Resume
+    if "cv" in cat or "cv" in q:
+        if "cover letter" in cat or "cover letter" in q:
+            return "Cover Letter Help"
+        return "CV / Resume Help"
+
+    # Cover letter
+    if "cover letter" in cat or "cover letter" in q:
+        return "Cover Letter Help"
+
+    # Internships
+    if "intern" in cat or "intern" in q:
+        return "Internships / Placements"
+
+    # EPA / Employability / Volunteering / Community
+    if (
+        "epa" in cat
+        or "employability" in cat
+        or "plus award" in cat
+        or "volunteer" in cat
+        or "community" in cat
+    ):
+        return "EPA / Workplace Skills"
+
+    # Appointments / sessions
+    if (
+        "appoint" in cat
+        or "drop-in" in cat
+        or "drop in" in cat
+        or "session" in cat
+        or "online career chat" in cat
+    ):
+        return "Appointments"
+
+    # Job search / applications / opportunities
+    if (
+        "job" in cat
+        or "opportunit" in cat
+        or "vacancy" in cat
+        or "application" in cat
+        or "job search" in cat
+    ):
+        return "Job Search & Applications"
+
+    # Everything else
+    return "Career Guidance / Other"
+
+
+def clean_text(text: str) -> str:
+    """Lowercase, drop symbols and collapse whitespace."""
+    text = str(text).lower()
+    text = re.sub(r"[^a-z0-9\s]", " ", text)  # remove symbols
+    text = re.sub(r"\s+", " ", text).strip()  # collapse spaces
+    return text
+
+
+def load_labeled_data(path: str) -> Tuple[pd.DataFrame, str]:
+    """Load the CSV, create a clean final_category, and return df + label name."""
+    df = pd.read_csv(path, encoding="latin1")
+
+    if "question" not in df.columns:
+        raise ValueError("The CSV must contain a 'question' column.")
+
+    # Pick a source category column.
+    source_col = next((c for c in SOURCE_COLUMNS if c in df.columns), None)
+    if source_col is None:
+        raise ValueError(
+            "CSV must contain a category-like column such as "
+            "'final category', 'final_category', 'final questions', 'category', or 'catergory'. "
+            f"Columns found: {list(df.columns)}"
+        )
+
+    df["final_category"] = [
+        make_final_category(category, question)
+        for category, question in zip(df[source_col].fillna(""), df["question"].fillna(""))
+    ]
+    df = df[["question", "final_category"]].dropna()
+    df["final_category"] = df["final_category"].astype(str).str.strip()
+    return df, "final_category"
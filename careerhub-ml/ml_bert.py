@@ -3,8 +3,6 @@
 # Uses sentence-transformers (MiniLM) + Logistic Regression
 # ============================================
 
-import pandas as pd
-import re
 import pickle
 import numpy as np
 
@@ -12,75 +10,20 @@ from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report, accuracy_score
 
-from sentence_transformers import SentenceTransformer
+from feature_store import FeatureStore
+from labels import clean_text, load_labeled_data
 
-# ---------- 1. Load data ----------
+CSV_PATH = "questions(Sheet1) (1).csv"
+BERT_MODEL_NAME = "all-MiniLM-L6-v2"  # small, fast, good
 
-df = pd.read_csv("questions(Sheet1) (1).csv", encoding="latin1")
+# ---------- 1-2. Load data and build final_category (shared with ml_training.py) ----------
 
-# ---------- 2. Build final_category (same logic as before) ----------
-
-def make_final_category(row):
-    cat = str(row.get("category", "")).lower()
-    q = str(row.get("question", "")).lower()
-
-    # CV / Resume things
-    if "cv" in cat or "cv" in q:
-        if "cover letter" in cat or "cover letter" in q:
-            return "Cover Letter Help"
-        return "CV / Resume Help"
-
-    # Cover letter
-    if "cover letter" in cat or "cover letter" in q:
-        return "Cover Letter Help"
-
-    # Internships
-    if "intern" in cat or "intern" in q:
-        return "Internships / Placements"
-
-    # EPA / Employability / Volunteering / Community
-    if ("epa" in cat or
-        "employability" in cat or
-        "plus award" in cat or
-        "volunteer" in cat or
-        "community" in cat):
-        return "EPA / Workplace Skills"
-
-    # Appointments / sessions
-    if ("appoint" in cat or
-        "drop-in" in cat or
-        "drop in" in cat or
-        "session" in cat or
-        "online career chat" in cat):
-        return "Appointments"
-
-    # Job search / applications / opportunities
-    if ("job" in cat or
-        "opportunit" in cat or
-        "vacancy" in cat or
-        "application" in cat or
-        "job search" in cat):
-        return "Job Search & Applications"
-
-    # Everything else
-    return "Career Guidance / Other"
-
-df["final_category"] = df.apply(make_final_category, axis=1)
+df, _ = load_labeled_data(CSV_PATH)
 
 # ---------- 3. Clean question text ----------
 
-def clean_text(text: str) -> str:
-    text = str(text).lower()
-    text = re.sub(r"[^a-z0-9\s]", " ", text)  # remove symbols
-    text = re.sub(r"\s+", " ", text).strip()  # collapse spaces
-    return text
-
 df["question"] = df["question"].astype(str).apply(clean_text)
 
-# Keep only what we need
-df = df[["question", "final_category"]].dropna()
-df["final_category"] = df["final_category"].astype(str).str.strip()
-
 print("Example rows:")
 print(df.head())
 print("\nCounts per category:")
@@ -95,16 +38,36 @@ X_train, X_test, y_train, y_test = train_test_split(
     X, y, test_size=0.2, random_state=42, stratify=y
 )
 
-# ---------- 5. Load BERT model & encode sentences ----------
+# ---------- 5. Encode sentences through the feature store ----------
+
+bert_model = None
+
+
+def get_bert_model():
+    """Load the sentence-transformers model on first use."""
+    global bert_model
+    if bert_model is None:
+        from sentence_transformers import SentenceTransformer
+
+        print(f"\nLoading BERT model ({BERT_MODEL_NAME})...")
+        bert_model = SentenceTransformer(BERT_MODEL_NAME)
+    return bert_model
+
+
+def bert_encoder():
+    model = get_bert_model()
+    return lambda texts: model.encode(texts, convert_to_numpy=True, show_progress_bar=True)
+
 
-print("\nLoading BERT model (all-MiniLM-L6-v2)...")
-bert_model = SentenceTransformer("all-MiniLM-L6-v2")  # small, fast, good
+# Only questions which are not in the store yet are encoded, a rerun on the
+# same CSV does not load the model at all.
+feature_store = FeatureStore(BERT_MODEL_NAME)
 
 print("Encoding training sentences...")
-X_train_emb = bert_model.encode(X_train, convert_to_numpy=True, show_progress_bar=True)
+X_train_emb = feature_store.encode(X_train, bert_encoder)
 
 print("Encoding test sentences...")
-X_test_emb = bert_model.encode(X_test, convert_to_numpy=True, show_progress_bar=True)
+X_test_emb = feature_store.encode(X_test, bert_encoder)
 
 # ---------- 6. Train classifier on BERT embeddings ----------
 
@@ -134,7 +97,7 @@ print("\nSaved classifier as 'bert_question_classifier.pkl'.")
 
 def predict_category(question_text: str) -> str:
     cleaned = clean_text(question_text)
-    emb = bert_model.encode([cleaned], convert_to_numpy=True)
+    emb = get_bert_model().encode([cleaned], convert_to_numpy=True)
     pred = clf.predict(emb)[0]
     return pred
 
@@ -0,0 +1,168 @@
+"""Hyperparameter and model-selection sweep for the question classifier.
+
+Every vectorizer setting is fitted once per cross-validation fold and reused by
+all classifiers of that fold. The (vectorizer, fold) tasks run in a process
+pool across all cores. The leaderboard reports mean accuracy, macro F1,
+inference latency per 1k questions and pickled model size.
+"""
+
+import argparse
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.svm import LinearSVC
+
+from labels import clean_text, load_labeled_data
+
+CSV_PATH = "questions(Sheet1) (1).csv"
+LEADERBOARD_PATH = "leaderboard.csv"
+
+VECTORIZERS: Dict[str, dict] = {
+    "word_1_2": {"stop_words": "english", "ngram_range": (1, 2), "max_features": 5000},
+    "word_1_1": {"stop_words": "english", "ngram_range": (1, 1)},
+    "word_1_2_sublinear": {"ngram_range": (1, 2), "sublinear_tf": True},
+    "char_wb_2_4": {"analyzer": "char_wb", "ngram_range": (2, 4), "sublinear_tf": True},
+    "char_wb_3_5": {"analyzer": "char_wb", "ngram_range": (3, 5), "sublinear_tf": True, "max_features": 20000},
+}
+
+# name -> (factory, oversample the training fold first)
+CLASSIFIERS = {
+    "lr_c0.3": (lambda: LogisticRegression(C=0.3, max_iter=1000), False),
+    "lr_c1": (lambda: LogisticRegression(C=1.0, max_iter=1000), False),
+    "lr_c3": (lambda: LogisticRegression(C=3.0, max_iter=1000), False),
+    "lr_c10": (lambda: LogisticRegression(C=10.0, max_iter=1000), False),
+    "lr_c1_balanced": (lambda: LogisticRegression(C=1.0, max_iter=1000, class_weight="balanced"), False),
+    "lr_c1_oversampled": (lambda: LogisticRegression(C=1.0, max_iter=1000), True),
+    "linear_svc_c0.3": (lambda: LinearSVC(C=0.3), False),
+    "linear_svc_c1": (lambda: LinearSVC(C=1.0), False),
+}
+
+LATENCY_QUESTIONS = 1000
+
+
+def oversample(X, y: np.ndarray, random_state: int = 42):
+    """Randomly repeat rows of the minority classes until every class has as many rows as the largest one."""
+    rng = np.random.RandomState(random_state)
+    classes, counts = np.unique(y, return_counts=True)
+    rows = [np.arange(len(y))]
+    for label, count in zip(classes, counts):
+        if count < counts.max():
+            rows.append(rng.choice(np.flatnonzero(y == label), counts.max() - count, replace=True))
+    rows = np.concatenate(rows)
+    return X[rows], y[rows]
+
+
+def latency_per_1k(vectorizer, clf, questions: List[str]) -> float:
+    """Milliseconds to vectorize and classify 1000 questions, one question per call like the server."""
+    sample = [questions[i % len(questions)] for i in range(LATENCY_QUESTIONS)]
+    start = time.perf_counter()
+    for question in sample:
+        clf.predict(vectorizer.transform([question]))
+    return (time.perf_counter() - start) * 1000
+
+
+def run_fold(task: Tuple[str, int, List[str], List[str], List[str], List[str]]) -> List[dict]:
+    """Fit one vectorizer on one fold and evaluate every classifier on it."""
+    vectorizer_name, fold, X_train, y_train, X_test, y_test = task
+    vectorizer = TfidfVectorizer(**VECTORIZERS[vectorizer_name])
+    X_train_vec = vectorizer.fit_transform(X_train)
+    X_test_vec = vectorizer.transform(X_test)
+    y_train = np.asarray(y_train)
+
+    results = []
+    for clf_name, (factory, resample) in CLASSIFIERS.items():
+        X_fit, y_fit = oversample(X_train_vec, y_train) if resample else (X_train_vec, y_train)
+        clf = factory()
+        clf.fit(X_fit, y_fit)
+        y_pred = clf.predict(X_test_vec)
+        results.append(
+            {
+                "vectorizer": vectorizer_name,
+                "classifier": clf_name,
+                "fold": fold,
+                "accuracy": accuracy_score(y_test, y_pred),
+                "macro_f1": f1_score(y_test, y_pred, average="macro", zero_division=0),
+                "latency_ms_per_1k": latency_per_1k(vectorizer, clf, X_test),
+                "model_bytes": len(pickle.dumps((vectorizer, clf))),
+            }
+        )
+    return results
+
+
+def make_tasks(df: pd.DataFrame, label_col: str, n_splits: int) -> List[tuple]:
+    """One task per (vectorizer, fold), the folds are stratified and shared by every vectorizer."""
+    X = df["question"].tolist()
+    y = df[label_col].tolist()
+    # every class needs at least one row per fold
+    n_splits = max(2, min(n_splits, int(df[label_col].value_counts().min())))
+    folds = list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42).split(X, y))
+    return [
+        (
+            name,
+            fold,
+            [X[i] for i in train],
+            [y[i] for i in train],
+            [X[i] for i in test],
+            [y[i] for i in test],
+        )
+        for name in VECTORIZERS
+        for fold, (train, test) in enumerate(folds)
+    ]
+
+
+def sweep(df: pd.DataFrame, label_col: str, n_splits: int = 5, workers: int = 0) -> pd.DataFrame:
+    """Run every (vectorizer, classifier) pair and return the leaderboard, best first."""
+    tasks = make_tasks(df, label_col, n_splits)
+    workers = workers or os.cpu_count() or 1
+    print(f"Running {len(tasks)} (vectorizer, fold) tasks x {len(CLASSIFIERS)} classifiers on {workers} processes...")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rows = [row for results in pool.map(run_fold, tasks) for row in results]
+
+    scores = pd.DataFrame(rows)
+    leaderboard = (
+        scores.groupby(["vectorizer", "classifier"])
+        .agg(
+            accuracy=("accuracy", "mean"),
+            accuracy_std=("accuracy", "std"),
+            macro_f1=("macro_f1", "mean"),
+            latency_ms_per_1k=("latency_ms_per_1k", "mean"),
+            model_bytes=("model_bytes", "mean"),
+        )
+        .reset_index()
+        .sort_values(["accuracy", "latency_ms_per_1k"], ascending=[False, True])
+        .reset_index(drop=True)
+    )
+    leaderboard["model_bytes"] = leaderboard["model_bytes"].round().astype(int)
+    return leaderboard
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=0, help="processes, 0 uses every core")
+    parser.add_argument("--out", default=LEADERBOARD_PATH, help="leaderboard CSV, a JSON copy is written next to it")
+    args = parser.parse_args()
+
+    df, label_col = load_labeled_data(args.csv)
+    df["question"] = df["question"].astype(str).apply(clean_text)
+
+    leaderboard = sweep(df, label_col, n_splits=args.folds, workers=args.workers)
+    leaderboard.to_csv(args.out, index=False)
+    with open(os.path.splitext(args.out)[0] + ".json", "w", encoding="utf-8") as f:
+        json.dump(leaderboard.to_dict(orient="records"), f, indent=2)
+
+    pd.set_option("display.width", 160)
+    print("\nLeaderboard:")
+    print(leaderboard.to_string(index=False))
+    print(f"\nSaved leaderboard to {args.out}")